@@ -2,19 +2,25 @@
 
 import os
 import json
-import subprocess
 import logging
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 
 
 
 from piece_carver import polygen as carver_bp
+from piece_generator import polygen as polycube_bp
+from solver_jobs import jobs as jobs_bp
 
 #
 from soma_grid import SomaGrid
 from utils import handle_solution, load_solutions, normalize_solution, VALID_PIECES
+from yass_runner import run_soma, first_solution, iter_solutions
+from solution_index import lookup_total_solutions, count_figure, LIVE_COUNT_LIMIT
+import soma_solver
+from feasibility import check_figure
+from figure_catalog import figure_catalog
 
 
 logging.basicConfig(level=logging.DEBUG)
@@ -25,6 +31,8 @@ app = Flask(__name__, static_folder='../frontend', static_url_path='')
 CORS(app)  
 
 app.register_blueprint(carver_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(polycube_bp, url_prefix='/api')
 
 @app.route('/')
 def serve_index():
@@ -32,9 +40,13 @@ def serve_index():
 
 @app.route('/api/shapes')
 def get_shapes():
+    """Shape list from the figure catalog; repeat requests with If-None-Match get a 304."""
     try:
-        shapes = SomaGrid.get_available_shapes()
-        return jsonify(shapes)
+        body, etag = figure_catalog.snapshot()
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error in get_shapes: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -97,32 +109,56 @@ def get_solutions(shape_id):
 @app.route('/api/total-solutions/<shape_id>')
 def get_total_solutions(shape_id):
     try:
-        shapes_dir = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
-        soma_path = os.path.join(shapes_dir, f"{shape_id}.soma")
-        soma_executable = os.path.join(os.path.dirname(__file__), 'yass', 'soma')
-
-        result = subprocess.run(
-            [soma_executable, '-cq', soma_path],
-            cwd=os.path.join(os.path.dirname(__file__), 'yass'),
-            capture_output=True, text=True
-        )
-
-        if result.returncode != 0:
-            return jsonify({"error": "Failed to get total solutions"}), 500
-
-
-        try:
-            total_solutions = result.stdout.split()[-2]
-        except Exception:
+        indexed, total_solutions = lookup_total_solutions(shape_id)
+        if not indexed:
+            # Not indexed yet (or the figure changed): count it live, within a budget.
+            soma_path = os.path.join(os.path.dirname(__file__), 'yass', 'figures', f"{shape_id}.soma")
+            total_solutions, output = count_figure(soma_path, time_limit=LIVE_COUNT_LIMIT)
+            if total_solutions is None:
+                logger.error(f"Failed to count solutions for {shape_id}: {output}")
+
+        if total_solutions is None:
             return jsonify({"error": "Failed to get total solutions"}), 500
 
-        return jsonify({"total_solutions": total_solutions})
+        return jsonify({"total_solutions": str(total_solutions)})
 
     except Exception as e:
         logger.error(f"Error getting total solutions for {shape_id}: {str(e)}")
         return jsonify({"error": "Failed to get total solutions"}), 500
 
 
+def _parse_figure(data):
+    """Parsed figure from the request, or None if YASS should report what is wrong with it."""
+    try:
+        return soma_solver.Figure.from_text(data['cube'])
+    except ValueError:
+        return None
+
+
+ENGINES = ('auto', 'yass', 'python')
+
+
+def _use_in_process(data, figure):
+    """
+    Whether the request should be solved by the in-process solver.
+    "engine" may be "yass", "python" or "auto" (the default), which picks the
+    in-process solver for small figures. Both engines give the first solution
+    in YASS's layout, so the choice does not change a response's format.
+    Returns (in_process, None) or (None, error response).
+    """
+    engine = data.get('engine', 'auto')
+    if engine not in ENGINES:
+        return None, (jsonify({"error": f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES)}"}), 400)
+    if engine == 'yass' or figure is None:
+        return False, None
+    return engine == 'python' or soma_solver.is_small_figure(figure), None
+
+
+def _infeasible(figure):
+    """(rule, message) if a pre-check proves the figure unsolvable, else None."""
+    return check_figure(figure) if figure is not None else None
+
+
 @app.route('/api/solve', methods=['POST'])
 def solve_legacy():
     try:
@@ -130,21 +166,56 @@ def solve_legacy():
         if not data or 'cube' not in data:
             return jsonify({"error": "Missing cube data"}), 400
 
-        input_file = "input.soma"
-        with open(input_file, 'w') as f:
-            f.write(data['cube'])
-
-        result = subprocess.run(
-            ["./yass/soma", input_file],
-            cwd=os.path.dirname(__file__),
-            capture_output=True, text=True
-        )
-        return jsonify({"output": result.stdout})
+        figure = _parse_figure(data)
+        in_process, error = _use_in_process(data, figure)
+        if error:
+            return error
+        rejection = _infeasible(figure)
+        if rejection:
+            rule, reason = rejection
+            return jsonify({"output": "No solution found.", "rule": rule, "reason": reason})
+        if in_process:
+            output = soma_solver.first_solution(figure)
+        else:
+            output = first_solution(data['cube'])
+        return jsonify({"output": output or "No solution found."})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/solve/stream', methods=['POST'])
+def solve_stream():
+    """
+    Stream every solution as NDJSON while YASS is still searching:
+      {"solution": 1, "pieces": {"c": [[x, y, z], ...], ...}}
+      ...
+      {"done": true, "solutions": N}   or   {"error": "..."}
+    """
+    data = request.json
+    if not data or 'cube' not in data:
+        return jsonify({"error": "Missing cube data"}), 400
+    cube = data['cube']
+    rejection = _infeasible(_parse_figure(data))
+
+    def generate():
+        if rejection:
+            rule, reason = rejection
+            yield json.dumps({"error": reason, "rule": rule}) + "\n"
+            return
+        count = 0
+        try:
+            for pieces in iter_solutions(cube):
+                count += 1
+                yield json.dumps({"solution": count, "pieces": pieces}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        yield json.dumps({"done": True, "solutions": count}) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
 @app.route('/api/hint', methods=['POST'])
 def hint_legacy():
     try:
@@ -152,18 +223,19 @@ def hint_legacy():
         if not data or 'cube' not in data:
             return jsonify({"error": "Missing cube data"}), 400
 
-        input_file = "input.soma"
-        with open(input_file, 'w') as f:
-            f.write(data['cube'])
-
-        result = subprocess.run(
-            ["./yass/soma", input_file, "-a"],
-            cwd=os.path.dirname(__file__),
-            capture_output=True, text=True
-        )
-        solutions = result.stdout.split("\n\n")
-        hint_solution = solutions[0] if solutions else "No solution found."
-        return jsonify({"hint": hint_solution})
+        figure = _parse_figure(data)
+        in_process, error = _use_in_process(data, figure)
+        if error:
+            return error
+        rejection = _infeasible(figure)
+        if rejection:
+            rule, reason = rejection
+            return jsonify({"hint": "No solution found.", "rule": rule, "reason": reason})
+        if in_process:
+            hint_solution = soma_solver.first_solution(figure)
+        else:
+            hint_solution = first_solution(data['cube'])
+        return jsonify({"hint": hint_solution or "No solution found."})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -176,16 +248,18 @@ def validate_legacy():
         if not data or 'cube' not in data:
             return jsonify({"error": "Missing cube data"}), 400
 
-        input_file = "input.soma"
-        with open(input_file, 'w') as f:
-            f.write(data['cube'])
-
-        result = subprocess.run(
-            ["./yass/soma", input_file],
-            cwd=os.path.dirname(__file__),
-            capture_output=True, text=True
-        )
-        is_valid = "solution" in result.stdout.lower()
+        figure = _parse_figure(data)
+        in_process, error = _use_in_process(data, figure)
+        if error:
+            return error
+        rejection = _infeasible(figure)
+        if rejection:
+            rule, reason = rejection
+            return jsonify({"valid": False, "rule": rule, "reason": reason})
+        if in_process:
+            is_valid = soma_solver.first_solution(figure) is not None
+        else:
+            is_valid = first_solution(data['cube']) is not None
         return jsonify({"valid": is_valid})
 
     except Exception as e:
@@ -199,17 +273,9 @@ def validate_orientation_legacy():
         if not data or 'cube' not in data:
             return jsonify({"error": "Missing cube data"}), 400
 
-        input_file = "input_orientation.soma"
-        with open(input_file, 'w') as f:
-            f.write(data['cube'])
-
-        result = subprocess.run(
-            ["./yass/soma", input_file],
-            cwd=os.path.dirname(__file__),
-            capture_output=True, text=True
-        )
-        is_valid = "solution" in result.stdout.lower()
-        return jsonify({"valid": is_valid, "output": result.stdout})
+        output = run_soma(data['cube'])
+        is_valid = "solution" in output.lower()
+        return jsonify({"valid": is_valid, "output": output})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,61 @@
+# bench_carver.py
+# Times carve_pieces on a set of boxes and rule sets.
+#   python bench_carver.py                 current carver.py
+#   python bench_carver.py --against REV   also run carver.py from git revision REV
+#                                          and check both return the same carving
+import os
+import sys
+import time
+import types
+import subprocess
+
+import carver
+
+CASES = [
+    ((2, 2, 2), {4: 1, 3: 1, 1: 1}),
+    ((3, 3, 3), {4: 6, 3: 1}),          # Example Rules txt files/soma3x3x3_rules.txt
+    ((3, 3, 3), {5: 3, 4: 3}),
+    ((2, 3, 4), {4: 3, 3: 4}),          # no carving: exhaustive search
+    ((4, 4, 4), {4: 16}),               # only 8 distinct tetracubes: exhaustive
+    ((3, 4, 5), {5: 6, 4: 6, 3: 2}),
+    ((4, 4, 4), {5: 8, 4: 6}),
+    ((4, 4, 4), {6: 4, 5: 8}),
+    ((5, 5, 5), {6: 10, 5: 13}),
+    ((4, 4, 4), {8: 8}),
+    ((4, 4, 5), {8: 5, 7: 4, 6: 2}),
+]
+
+
+def load_revision(rev):
+    """carver.py as of a git revision, imported as a throwaway module."""
+    source = subprocess.run(
+        ['git', 'show', f'{rev}:backend/carver.py'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType(f'carver_{rev}')
+    exec(compile(source, f'carver@{rev}', 'exec'), module.__dict__)
+    return module
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    reference = None
+    if '--against' in sys.argv:
+        reference = load_revision(sys.argv[sys.argv.index('--against') + 1])
+
+    print(f"{'grid':10} {'rules':28} {'found':>5} {'ms':>10} {'dead hit/miss':>15} {'ref ms':>10} {'same':>5}")
+    for dims, rules in CASES:
+        dead = carver.DeadStateTable()
+        elapsed, result = timed(carver.carve_pieces, dims, rules, dead)
+        row = (f"{'x'.join(map(str, dims)):10} {str(rules):28} {str(result is not None):>5} {elapsed*1000:>10.1f}"
+               f" {f'{dead.hits}/{dead.misses}':>15}")
+        if reference is not None:
+            ref_elapsed, ref_result = timed(reference.carve_pieces, dims, rules)
+            row += f" {ref_elapsed*1000:>10.1f} {str(ref_result == result):>5}"
+        print(row, flush=True)
@@ -0,0 +1,65 @@
+# bench_polycubes.py
+# Times free polycube enumeration (polycubes.py) level by level and checks the
+# counts against the known values (OEIS A000162, mirror images distinct).
+#   python bench_polycubes.py                  n = 1..10
+#   python bench_polycubes.py 8                n = 1..8
+#   python bench_polycubes.py --processes N    grow levels across N processes
+#   python bench_polycubes.py --against N      also time the old
+#                                              piece_generator.generate_polycubes
+#                                              recursion up to n = N and compare
+import sys
+import time
+
+import geometry
+import polycubes
+
+KNOWN_COUNTS = (1, 1, 2, 8, 29, 166, 1023, 6922, 48311, 346543, 2522522)
+
+
+def reference_polycubes(n):
+    """The recursive growth piece_generator.generate_polycubes used to do."""
+    seen = set()
+
+    def dfs(current):
+        if len(current) == n:
+            seen.add(geometry.canonical_form(current))
+            return
+        for x, y, z in list(current):
+            for nbr in ((x+1, y, z), (x-1, y, z), (x, y+1, z), (x, y-1, z), (x, y, z+1), (x, y, z-1)):
+                if nbr not in current:
+                    dfs(current | {nbr})
+
+    dfs({(0, 0, 0)})
+    return seen
+
+
+def option(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+if __name__ == "__main__":
+    processes = option('--processes', None)
+    against = option('--against', 0)
+    positional = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith('--')
+                  and not sys.argv[i - 1].startswith('--')]
+    max_n = int(positional[0]) if positional else 10
+
+    print(f"{'n':>3} {'count':>9} {'known':>9} {'ok':>5} {'ms':>10} {'ref ms':>10} {'same':>5}")
+    failed = False
+    for n in range(1, max_n + 1):
+        start = time.perf_counter()
+        keys = polycubes.free_polycubes(n, processes)
+        elapsed = time.perf_counter() - start
+        ok = n > len(KNOWN_COUNTS) or len(keys) == KNOWN_COUNTS[n - 1]
+        failed |= not ok
+        row = (f"{n:>3} {len(keys):>9} {KNOWN_COUNTS[n - 1] if n <= len(KNOWN_COUNTS) else '?':>9}"
+               f" {str(ok):>5} {elapsed*1000:>10.1f}")
+        if n <= against:
+            start = time.perf_counter()
+            reference = reference_polycubes(n)
+            ref_elapsed = time.perf_counter() - start
+            same = reference == {geometry.canonical_form(geometry.shape_cells(k)) for k in keys}
+            failed |= not same
+            row += f" {ref_elapsed*1000:>10.1f} {str(same):>5}"
+        print(row, flush=True)
+    sys.exit(1 if failed else 0)
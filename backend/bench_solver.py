@@ -0,0 +1,63 @@
+# bench_solver.py
+# Times the in-process solver (soma_solver) against the YASS binary on every
+# figure in yass/figures.
+#   python bench_solver.py            first solution: in-process vs `soma -q`
+#   python bench_solver.py --count    full counts: in-process vs `soma -cr`
+# Set SOMA_EXECUTABLE to point at a yass binary built for this machine.
+import os
+import re
+import sys
+import time
+import subprocess
+
+import soma_solver
+from yass_runner import SOMA_EXECUTABLE
+
+FIGURES_DIR = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
+
+
+def time_yass(text, flags):
+    start = time.perf_counter()
+    result = subprocess.run([SOMA_EXECUTABLE, *flags, '-'], input=text, capture_output=True, text=True)
+    return time.perf_counter() - start, result.stdout
+
+
+if __name__ == "__main__":
+    count_mode = '--count' in sys.argv
+    rows = []
+    mismatches = []
+    for file_name in sorted(os.listdir(FIGURES_DIR)):
+        if not file_name.endswith('.soma'):
+            continue
+        with open(os.path.join(FIGURES_DIR, file_name)) as f:
+            text = f.read()
+        try:
+            start = time.perf_counter()
+            figure = soma_solver.Figure.from_text(text)
+            if count_mode:
+                result = soma_solver.count_solutions(figure)
+            else:
+                result = soma_solver.first_solution(figure) is not None
+            py_time = time.perf_counter() - start
+        except ValueError:
+            continue
+
+        if count_mode:
+            yass_time, out = time_yass(text, ['-cqr'])
+            match = re.search(r':\s+(\d+) solutions?', out)
+            if (int(match.group(1)) if match else 0) != result:
+                mismatches.append(file_name)
+        else:
+            yass_time, out = time_yass(text, ['-q'])
+        rows.append((file_name, len(figure.placements()), py_time, yass_time))
+
+    print(f"{'figure':40} {'placements':>10} {'python ms':>10} {'yass ms':>10}")
+    for file_name, placements, py_time, yass_time in rows:
+        print(f"{file_name:40} {placements:>10} {py_time*1000:>10.2f} {yass_time*1000:>10.2f}")
+
+    small = [r for r in rows if r[1] <= soma_solver.SMALL_FIGURE_PLACEMENTS]
+    print(f"\nall figures:   python {sum(r[2] for r in rows):.3f}s  yass {sum(r[3] for r in rows):.3f}s")
+    print(f"small figures: python {sum(r[2] for r in small):.3f}s  yass {sum(r[3] for r in small):.3f}s "
+          f"({len(small)} with <= {soma_solver.SMALL_FIGURE_PLACEMENTS} placements)")
+    if count_mode:
+        print(f"count mismatches: {mismatches or 'none'}")
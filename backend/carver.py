@@ -6,151 +6,629 @@
 # If a valid tiling is found, it returns a dictionary mapping each requested
 # size to a list of Count shapes (each shape is a list of [x,y,z] coordinates).
 # If no valid tiling exists, it returns None.
+# carve() runs the same search under a node / wall-clock budget and reports
+# progress; the search is an explicit stack, so grid size is not limited by
+# Python's recursion limit.
 
-from typing import Dict, List, Tuple, Optional
-from itertools import permutations, product
-import sys
-sys.setrecursionlimit(10_000)
-
-elements = (0,1,2)
-ROTATIONS = []
-for perm in permutations(elements, 3):
-    for signs in product((1, -1), repeat=3):
-        def make_rot(perm, signs):
-            def rot(cell):
-                x, y, z = cell
-                return (
-                    signs[0] * cell[perm[0]],
-                    signs[1] * cell[perm[1]],
-                    signs[2] * cell[perm[2]]
-                )
-            return rot
-        R = make_rot(perm, signs)
-        m0, m1, m2 = R((1,0,0)), R((0,1,0)), R((0,0,1))
-        det = (
-            m0[0] * (m1[1]*m2[2] - m1[2]*m2[1])
-          - m0[1] * (m1[0]*m2[2] - m1[2]*m2[0])
-          + m0[2] * (m1[0]*m2[1] - m1[1]*m2[0])
-        )
-        if det == 1:
-            ROTATIONS.append(R)
-
-
-def normalize(shape: List[Tuple[int,int,int]]) -> Tuple[Tuple[int,int,int], ...]:
-    xs, ys, zs = zip(*shape)
-    dx, dy, dz = min(xs), min(ys), min(zs)
-    shifted = [(x-dx, y-dy, z-dz) for x,y,z in shape]
-    return tuple(sorted(shifted))
-
-
-def canonical_key(shape: List[Tuple[int,int,int]]) -> Tuple[Tuple[int,int,int], ...]:
-    """
-    Return the lexicographically smallest normalized form of shape over all rotations.
-    """
-    forms = [normalize([R(cell) for cell in shape]) for R in ROTATIONS]
-    return min(forms)
+import time
+import random
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Union
 
+from geometry import canonical_form, rotate, rotation_tables, shape_id
 
-def carve_pieces(
-    grid_dims: Tuple[int, int, int],
-    rules: Dict[int, int]
-) -> Optional[Dict[int, List[List[List[int]]]]]:
-    X, Y, Z = grid_dims
-    volume = X * Y * Z
+# canonical_key(shape): the lexicographically smallest normalized form of a
+# shape over all 24 rotations.
+canonical_key = canonical_form
+
+
+NEIGHBOR_DIRS = [(1,0,0),(-1,0,0),(0,1,0),(0,-1,0),(0,0,1),(0,0,-1)]
+
+
+class Board:
+    """
+    Bitboard geometry of an X×Y×Z grid. Cell (x, y, z) is bit (x*Y + y)*Z + z,
+    so the lowest set bit of the empty mask is the first empty cell in the
+    x, y, z scan order the search has always used.
+    With `cells`, only those cells of the grid are to be carved (an irregular
+    target figure); `full` is then their mask instead of the whole box.
+    """
+
+    def __init__(self, grid_dims: Tuple[int, int, int],
+                 cells: Optional[Iterable[Tuple[int,int,int]]] = None):
+        X, Y, Z = grid_dims
+        self.dims = tuple(grid_dims)
+        self.size = X * Y * Z
+        self.coords: List[Tuple[int,int,int]] = [
+            (x, y, z) for x in range(X) for y in range(Y) for z in range(Z)
+        ]
+        if cells is None:
+            self.full = (1 << self.size) - 1
+        else:
+            self.full = 0
+            for x, y, z in cells:
+                if not (0 <= x < X and 0 <= y < Y and 0 <= z < Z):
+                    raise ValueError(f"Cell {(x, y, z)} out of bounds for grid {grid_dims}")
+                self.full |= 1 << ((x*Y + y)*Z + z)
+        self.volume = bin(self.full).count('1')
+        self.neighbors: List[int] = []
+        for x, y, z in self.coords:
+            mask = 0
+            for dx, dy, dz in NEIGHBOR_DIRS:
+                nx, ny, nz = x+dx, y+dy, z+dz
+                if 0 <= nx < X and 0 <= ny < Y and 0 <= nz < Z:
+                    mask |= 1 << ((nx*Y + ny)*Z + nz)
+            self.neighbors.append(mask)
+
+        # cells that may shift one step in each direction without leaving the grid
+        self._shifts = []
+        for step, axis, limit in ((1, 2, Z), (Z, 1, Y), (Y*Z, 0, X)):
+            up = down = 0
+            for i, cell in enumerate(self.coords):
+                if cell[axis] < limit - 1:
+                    up |= 1 << i
+                if cell[axis] > 0:
+                    down |= 1 << i
+            self._shifts.append((step, up, down))
+
+        # (mask >> anchor) * Y*Z + anchor's (y, z) -> shape id, see anchored_id()
+        self._plane = Y * Z
+        self._shape_ids: Dict[int, int] = {}
+
+    @classmethod
+    def for_cells(cls, cells: Iterable[Tuple[int,int,int]]) -> 'Board':
+        """Board for a target cell set, moved so its bounding box starts at the origin."""
+        cells = list(cells)
+        if not cells:
+            raise ValueError("Empty target figure")
+        lo = [min(c[i] for c in cells) for i in range(3)]
+        shifted = [(x-lo[0], y-lo[1], z-lo[2]) for x, y, z in cells]
+        dims = tuple(max(c[i] for c in shifted) + 1 for i in range(3))
+        return cls(dims, shifted)
+
+    def grow(self, mask: int) -> int:
+        """mask plus every face neighbour of its cells."""
+        out = mask
+        for step, up, down in self._shifts:
+            out |= (mask & up) << step | (mask & down) >> step
+        return out
+
+    def component(self, seed: int, region: int) -> int:
+        """Cells of region face-connected to the seed bit."""
+        comp = seed
+        while True:
+            grown = self.grow(comp) & region
+            if grown == comp:
+                return comp
+            comp = grown
+
+    def symmetries(self) -> List[List[int]]:
+        """
+        Cell permutations (perm[cell] = image) of every rotation mapping the
+        carved cells onto themselves, identity first: for a full box 24 for a
+        cube, 8 or 4 otherwise.
+        """
+        perms = []
+        for index in range(24):
+            dims, image, _ = rotation_tables(self.dims, index)
+            if dims != self.dims:
+                continue
+            perm = image.tolist()
+            if self.transform(self.full, perm) == self.full:
+                perms.append(perm)
+        return perms
+
+    @staticmethod
+    def transform(mask: int, perm: List[int]) -> int:
+        out = 0
+        while mask:
+            low = mask & -mask
+            out |= 1 << perm[low.bit_length() - 1]
+            mask ^= low
+        return out
+
+    def cells_of(self, mask: int) -> List[Tuple[int,int,int]]:
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.coords[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def anchored_id(self, mask: int, start: int) -> int:
+        """
+        Shape id of the cells of mask, whose lowest cell is start. On one
+        board mask >> start and start's (y, z) name the fixed shape, so
+        repeat placements cost two int operations and one lookup.
+        """
+        memo = (mask >> start) * self._plane + start % self._plane
+        key = self._shape_ids.get(memo)
+        if key is None:
+            x0, y0, z0 = self.coords[start]
+            key = anchored_key(tuple((x-x0, y-y0, z-z0) for x, y, z in self.cells_of(mask)))
+            if len(self._shape_ids) > ANCHORED_KEYS_MAX:
+                self._shape_ids.clear()
+            self._shape_ids[memo] = key
+        return key
+
+
+# anchored shape -> shape id, see anchored_key()
+_ANCHORED_KEYS: Dict[Tuple[Tuple[int,int,int], ...], int] = {}
+ANCHORED_KEYS_MAX = 1 << 20
 
+
+def anchored_key(offsets: Tuple[Tuple[int,int,int], ...]) -> int:
+    """
+    geometry.shape_id of a shape given as sorted offsets from its smallest
+    cell, which is how the carver sees every fixed placement. Computing one
+    id memoizes all 24 rotated copies of the shape at once.
+    """
+    key = _ANCHORED_KEYS.get(offsets)
+    if key is None:
+        key = shape_id(offsets)
+        if len(_ANCHORED_KEYS) > ANCHORED_KEYS_MAX:
+            _ANCHORED_KEYS.clear()
+        for index in range(24):
+            rotated = sorted(rotate(offsets, index))
+            ax, ay, az = rotated[0]
+            _ANCHORED_KEYS[tuple((x-ax, y-ay, z-az) for x, y, z in rotated)] = key
+    return key
+
+
+class DeadStateTable:
+    """
+    Bounded LRU set of carving states known to have no completion, keyed by
+    (filled mask, next size index, frozenset of used shape ids).
+    hits/misses count lookups so the bound can be sized from real runs.
+    """
+
+    def __init__(self, max_entries: int = 1 << 18):
+        self.max_entries = max_entries
+        self._states: "OrderedDict[tuple, None]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, state: tuple) -> bool:
+        if state in self._states:
+            self._states.move_to_end(state)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, state: tuple) -> None:
+        self._states[state] = None
+        if len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+
+FOUND = 'found'
+IMPOSSIBLE = 'impossible'
+NODE_BUDGET = 'node_budget'
+TIME_BUDGET = 'time_budget'
+CANCELLED = 'cancelled'
+COMPLETE = 'complete'
+
+PROGRESS_EVERY = 1000
+
+# Growth steps between budget checks inside one candidate enumeration; a single
+# enumeration of a large size on a large board can otherwise run for minutes.
+CANDIDATE_CHECK_EVERY = 1 << 12
+
+
+class SearchStopped(Exception):
+    """Raised out of CarveSearch.candidates when the budget runs out; the search's status says why."""
+
+
+@dataclass
+class CarveProgress:
+    """Snapshot passed to progress callbacks every PROGRESS_EVERY nodes."""
+    nodes: int
+    depth: int
+    best_depth: int
+    best_partial: List[List[Tuple[int,int,int]]]
+    elapsed: float
+
+
+@dataclass
+class CarveResult:
+    """
+    Outcome of carve(): status is FOUND, IMPOSSIBLE, NODE_BUDGET,
+    TIME_BUDGET or CANCELLED; shapes is set only when FOUND.
+    """
+    status: str
+    shapes: Optional[Dict[int, List[List[List[int]]]]] = None
+    nodes: int = 0
+    elapsed: float = 0.0
+    best_depth: int = 0
+
+
+@dataclass
+class CarveCount:
+    """
+    Outcome of count_carvings(). tilings counts every carving; distinct counts
+    them up to rotation of the whole grid (Burnside: the mean over the box's
+    rotations of the carvings each one fixes, listed in fixed). status is
+    COMPLETE, or the budget that ran out (the counts are then partial).
+    """
+    status: str
+    tilings: int = 0
+    distinct: int = 0
+    fixed: List[int] = field(default_factory=list)
+    nodes: int = 0
+    elapsed: float = 0.0
+
+
+def as_board(grid: Union[Tuple[int, int, int], Board]) -> Board:
+    """The carving functions take either X×Y×Z box dims or a Board (e.g. Board.for_cells)."""
+    return grid if isinstance(grid, Board) else Board(grid)
+
+
+def sizes_for(rules: Dict[int, int], volume: int) -> Optional[List[int]]:
+    """Piece sizes to place, largest first, or None if they can't fill the volume."""
     sizes_list: List[int] = []
     for size, cnt in rules.items():
         if size * cnt > volume:
             return None
         sizes_list += [size] * cnt
-
     if sum(sizes_list) != volume:
         return None
     sizes_list.sort(reverse=True)
+    return sizes_list
 
-    grid = [[[False]*Z for _ in range(Y)] for _ in range(X)]
-    placed_shapes: List[List[Tuple[int,int,int]]] = [None] * len(sizes_list)
-    NEIGHBOR_DIRS = [(1,0,0),(-1,0,0),(0,1,0),(0,-1,0),(0,0,1),(0,0,-1)]
 
-    def in_bounds(x,y,z):
-        return 0 <= x < X and 0 <= y < Y and 0 <= z < Z
+class CarveSearch:
+    """
+    Explicit-stack carving search over one board and one multiset of piece
+    sizes. Every frame on the stack is one state: the filled cells, the sizes
+    still to place (largest first) and the shape ids already used.
+    A frame's candidates are shapes anchored at the first empty cell:
 
-    def find_first_empty() -> Optional[Tuple[int,int,int]]:
-        for x in range(X):
-            for y in range(Y):
-                for z in range(Z):
-                    if not grid[x][y][z]:
-                        return (x,y,z)
-        return None
+      - by default only the largest remaining size is tried, with one shape
+        per shape id (the fast search for a single carving);
+      - with exhaustive=True every remaining size and every fixed placement is
+        tried, so each tiling of the board is reached exactly once.
 
-    def get_unfilled_neighbors(cell: Tuple[int,int,int]) -> List[Tuple[int,int,int]]:
-        x, y, z = cell
-        out = []
-        for dx,dy,dz in NEIGHBOR_DIRS:
-            nx, ny, nz = x+dx, y+dy, z+dz
-            if in_bounds(nx,ny,nz) and not grid[nx][ny][nz]:
-                out.append((nx,ny,nz))
-        return out
+    With a seed the candidates of every frame are visited in a shuffled order.
+    The search stops cleanly when max_nodes states have been expanded, the
+    deadline passes or stop() returns True, recording why in status; the
+    budget is also checked while a frame's candidates are enumerated.
+    """
 
-    def generate_connected_shapes(
-        start: Tuple[int,int,int], size: int
-    ) -> List[List[Tuple[int,int,int]]]:
-        all_shapes: List[List[Tuple[int,int,int]]] = []
-        def dfs(shape_list, shape_set, frontier):
-            if len(shape_list) == size:
-                all_shapes.append(shape_list.copy())
-                return
-            for cell in sorted(frontier):
-                if cell <= start:
-                    continue
-                new_shape = shape_list + [cell]
-                new_set = shape_set | {cell}
-                new_frontier = (frontier - {cell})
-                for nb in get_unfilled_neighbors(cell):
-                    if nb not in new_set:
-                        new_frontier.add(nb)
-                dfs(new_shape, new_set, new_frontier)
-        dfs([start], {start}, set(get_unfilled_neighbors(start)))
-        unique, seen = [], set()
-        for shape in all_shapes:
-            key = canonical_key(shape)
-            if key not in seen:
-                seen.add(key)
-                unique.append(shape)
+    def __init__(self, board: Board, sizes_list: List[int],
+                 dead_states: Optional[DeadStateTable] = None,
+                 max_nodes: Optional[int] = None, time_limit: Optional[float] = None,
+                 progress: Optional[Callable[[CarveProgress], None]] = None,
+                 progress_every: int = PROGRESS_EVERY,
+                 stop: Optional[Callable[[], bool]] = None,
+                 exhaustive: bool = False, seed: Optional[int] = None):
+        self.board = board
+        self.sizes_list = sorted(sizes_list, reverse=True)
+        self.dead_states = dead_states if dead_states is not None else DeadStateTable()
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.progress = progress
+        self.progress_every = progress_every
+        self.stop = stop
+        self.exhaustive = exhaustive
+        self.rng = random.Random(seed) if seed is not None else None
+        self._reachable: Dict[Tuple[int, ...], int] = {}
+        self.status: Optional[str] = None
+        self.nodes = 0
+        self.best_depth = 0
+        self.best_partial: List[List[int]] = []
+        self._started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def reachable(self, remaining: Tuple[int, ...]) -> int:
+        """Bitset of every volume some subset of `remaining` adds up to."""
+        sums = self._reachable.get(remaining)
+        if sums is None:
+            sums = 1
+            for size in remaining:
+                sums |= sums << size
+            self._reachable[remaining] = sums
+        return sums
+
+    def candidates(self, filled: int, start: int, size: int,
+                   all_placements: bool = False) -> List[Tuple[List[int], int, int]]:
+        """
+        Connected shapes of `size` empty cells containing `start`, as
+        (cell indices in growth order, mask, shape id); one per shape unless
+        all_placements is set.
+        Redelmeier's method: every fixed polycube anchored at `start` is built
+        exactly once, because a cell passed over at one level leaves the
+        untried set for the rest of that subtree.
+        The budget is checked every CANDIDATE_CHECK_EVERY steps; raises
+        SearchStopped when it runs out.
+        """
+        board = self.board
+        neighbors = board.neighbors
+        empty = board.full & ~filled
+        unique: List[Tuple[List[int], int, int]] = []
+        seen_keys = set()
+
+        start_bit = 1 << start
+        shape, mask = [start], start_bit
+        first = neighbors[start] & empty
+        # one frame per cell after the anchor: (untried, seen, bit added)
+        stack = [[first, start_bit | first, 0]] if size > 1 else []
+        if size == 1:
+            unique.append((shape, mask, board.anchored_id(mask, start)))
+        countdown = CANDIDATE_CHECK_EVERY
+        while stack:
+            countdown -= 1
+            if not countdown:
+                if self._out_of_budget():
+                    raise SearchStopped(self.status)
+                countdown = CANDIDATE_CHECK_EVERY
+            frame = stack[-1]
+            untried, seen = frame[0], frame[1]
+            if not untried:
+                stack.pop()
+                if frame[2]:
+                    shape.pop()
+                    mask ^= frame[2]
+                continue
+            low = untried & -untried
+            frame[0] = untried ^ low
+            cell = low.bit_length() - 1
+            if len(shape) + 1 == size:
+                key = board.anchored_id(mask | low, start)
+                if all_placements or key not in seen_keys:
+                    seen_keys.add(key)
+                    unique.append((shape + [cell], mask | low, key))
+            else:
+                new = neighbors[cell] & empty & ~seen
+                shape.append(cell)
+                mask |= low
+                stack.append([frame[0] | new, seen | new, low])
         return unique
 
-    def place_piece(index: int, used_keys: set) -> bool:
-        if index >= len(sizes_list):
-            return True
-        size = sizes_list[index]
-        start = find_first_empty()
-        if start is None:
-            return False
-
-        for shape in generate_connected_shapes(start, size):
-            key = canonical_key(shape)
-            if key in used_keys:
+    def pockets_fillable(self, filled: int, mask: int, remaining: Tuple[int, ...]) -> bool:
+        """
+        With `mask` just placed, does every pocket of empty cells it touches
+        have a volume that some of the `remaining` sizes sum to? A partial
+        check: False means the branch is dead, but True does not mean it can be
+        completed. Each pocket is checked on its own, not against the other
+        pockets' claims on the same sizes, and untouched pockets are not
+        re-checked against the sizes left now.
+        """
+        board = self.board
+        empty = board.full & ~filled
+        seeds = board.grow(mask) & empty
+        sums = self.reachable(remaining)
+        while seeds:
+            pocket = board.component(seeds & -seeds, empty)
+            if not sums >> bin(pocket).count('1') & 1:
+                return False
+            seeds &= ~pocket
+        return True
+
+    def _expand(self, filled: int, remaining: Tuple[int, ...], used: set) -> Optional[list]:
+        """New stack frame for a state, or None if it is known dead."""
+        self.nodes += 1
+        state = (filled, remaining, frozenset(used))
+        if state in self.dead_states:
+            return None
+        empty = self.board.full & ~filled
+        start = (empty & -empty).bit_length() - 1
+        sizes = sorted(set(remaining), reverse=True) if self.exhaustive else remaining[:1]
+        cands = []
+        for size in sizes:
+            rest = list(remaining)
+            rest.remove(size)
+            rest = tuple(rest)
+            cands += [(size, rest, shape, mask, key)
+                      for shape, mask, key in self.candidates(filled, start, size, self.exhaustive)]
+        if self.rng is not None:
+            self.rng.shuffle(cands)
+        # [remaining, state, candidates, next candidate, placed (mask, key), subtree had a tiling]
+        return [remaining, state, cands, 0, None, False]
+
+    def _out_of_budget(self) -> bool:
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self.status = NODE_BUDGET
+        elif self.time_limit is not None and self.elapsed >= self.time_limit:
+            self.status = TIME_BUDGET
+        elif self.stop is not None and self.stop():
+            self.status = CANCELLED
+        return self.status is not None
+
+    def tilings(self, filled: int = 0, remaining: Optional[Tuple[int, ...]] = None, used_keys=(),
+                placed: Optional[List[Tuple[int, List[int]]]] = None) -> Iterator[List[Tuple[int, List[int]]]]:
+        """
+        Yield every tiling reachable from a partial state as a list of
+        (size, cell indices) in placement order; `remaining` defaults to the
+        whole size list. Afterwards status is IMPOSSIBLE once the space is
+        exhausted, or the reason the search stopped early.
+        """
+        remaining = tuple(self.sizes_list) if remaining is None else tuple(sorted(remaining, reverse=True))
+        used = set(used_keys)
+        placed = list(placed or [])
+        self.status = None
+        if not remaining:
+            if filled == self.board.full:
+                yield list(placed)
+            self.status = IMPOSSIBLE
+            return
+
+        frames = []
+        try:
+            root = self._expand(filled, remaining, used)
+        except SearchStopped:
+            return
+        if root is not None:
+            frames.append(root)
+        while frames:
+            frame = frames[-1]
+            cands = frame[2]
+            if frame[4] is not None:
+                mask, key = frame[4]
+                filled &= ~mask
+                used.discard(key)
+                placed.pop()
+                frame[4] = None
+
+            pos = frame[3]
+            choice = None
+            while pos < len(cands):
+                size, rest, shape, mask, key = cands[pos]
+                pos += 1
+                if key not in used and self.pockets_fillable(filled | mask, mask, rest):
+                    choice = cands[pos - 1]
+                    break
+            frame[3] = pos
+            if choice is None:
+                if not frame[5]:
+                    self.dead_states.add(frame[1])
+                frames.pop()
                 continue
-            for (x,y,z) in shape:
-                grid[x][y][z] = True
-            placed_shapes[index] = shape
-            used_keys.add(key)
 
-            if place_piece(index+1, used_keys):
-                return True
+            size, rest, shape, mask, key = choice
+            filled |= mask
+            used.add(key)
+            placed.append((size, shape))
+            frame[4] = (mask, key)
+            if len(placed) > self.best_depth:
+                self.best_depth = len(placed)
+                self.best_partial = [cells for _size, cells in placed]
 
-            used_keys.remove(key)
-            for (x,y,z) in shape:
-                grid[x][y][z] = False
-            placed_shapes[index] = None
+            if not rest:
+                for f in frames:
+                    f[5] = True
+                yield list(placed)
+                continue
 
-        return False
+            if self._out_of_budget():
+                return
+            try:
+                child = self._expand(filled, rest, used)
+            except SearchStopped:
+                return
+            if self.progress is not None and self.nodes % self.progress_every == 0:
+                self.progress(CarveProgress(
+                    nodes=self.nodes, depth=len(placed), best_depth=self.best_depth,
+                    best_partial=[[self.board.coords[c] for c in cells] for cells in self.best_partial],
+                    elapsed=self.elapsed,
+                ))
+            if child is not None:
+                frames.append(child)
+        self.status = IMPOSSIBLE
+
+    def to_shapes(self, placed: List[Tuple[int, List[int]]]) -> Dict[int, List[List[List[int]]]]:
+        """carve_pieces' result format: {size: [[[x, y, z], ...], ...]}, sizes largest first."""
+        result: Dict[int, List[List[List[int]]]] = {}
+        for size, cells in sorted(placed, key=lambda p: -p[0]):
+            result.setdefault(size, []).append([list(self.board.coords[c]) for c in cells])
+        return result
+
+
+def carve(
+    grid_dims: Union[Tuple[int, int, int], Board],
+    rules: Dict[int, int],
+    max_nodes: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    progress: Optional[Callable[[CarveProgress], None]] = None,
+    dead_states: Optional[DeadStateTable] = None
+) -> CarveResult:
+    """
+    First carving of the grid under a node and/or wall-clock budget.
+    progress, if given, is called every PROGRESS_EVERY expanded nodes.
+    """
+    board = as_board(grid_dims)
+    sizes_list = sizes_for(rules, board.volume)
+    if sizes_list is None:
+        return CarveResult(IMPOSSIBLE)
+    search = CarveSearch(board, sizes_list, dead_states, max_nodes, time_limit, progress)
+    for placed in search.tilings():
+        return CarveResult(FOUND, search.to_shapes(placed), search.nodes, search.elapsed, search.best_depth)
+    return CarveResult(search.status, None, search.nodes, search.elapsed, search.best_depth)
+
+
+def carve_pieces(
+    grid_dims: Union[Tuple[int, int, int], Board],
+    rules: Dict[int, int],
+    dead_states: Optional[DeadStateTable] = None
+) -> Optional[Dict[int, List[List[List[int]]]]]:
+    """
+    First carving of the grid with no budget, or None if there is none.
+    dead_states may be passed in to read its hit/miss counters afterwards;
+    it must not be shared between different grids or rule sets.
+    """
+    return carve(grid_dims, rules, dead_states=dead_states).shapes
+
+
+def iter_carvings(
+    grid_dims: Union[Tuple[int, int, int], Board],
+    rules: Dict[int, int],
+    seed: Optional[int] = None,
+    exhaustive: bool = True,
+    max_nodes: Optional[int] = None,
+    time_limit: Optional[float] = None
+) -> Iterator[CarveResult]:
+    """
+    Lazily yield distinct carvings of the grid as FOUND CarveResults, skipping
+    any that is a rotation of the whole grid of one already yielded. With a
+    seed, branches are explored in a random (reproducible) order. The last
+    result has a different status: IMPOSSIBLE once every carving has been
+    produced, or the budget that ran out.
+    exhaustive=False only walks the space carve_pieces() searches.
+    """
+    board = as_board(grid_dims)
+    sizes_list = sizes_for(rules, board.volume)
+    if sizes_list is None:
+        yield CarveResult(IMPOSSIBLE)
+        return
+    symmetries = board.symmetries()
+    search = CarveSearch(board, sizes_list, max_nodes=max_nodes, time_limit=time_limit,
+                         exhaustive=exhaustive, seed=seed)
+    seen = set()
+    for placed in search.tilings():
+        masks = [sum(1 << c for c in cells) for _size, cells in placed]
+        signature = min(tuple(sorted(board.transform(m, perm) for m in masks)) for perm in symmetries)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        yield CarveResult(FOUND, search.to_shapes(placed), search.nodes, search.elapsed, search.best_depth)
+    yield CarveResult(search.status, None, search.nodes, search.elapsed, search.best_depth)
+
+
+def fixed_counts(board: Board, symmetries: List[List[int]],
+                 tilings: Iterator[List[Tuple[int, List[int]]]]) -> List[int]:
+    """For each symmetry, how many of the tilings it maps onto themselves."""
+    fixed = [0] * len(symmetries)
+    for placed in tilings:
+        masks = {sum(1 << c for c in cells) for _size, cells in placed}
+        fixed[0] += 1
+        for i in range(1, len(symmetries)):
+            if all(board.transform(m, symmetries[i]) in masks for m in masks):
+                fixed[i] += 1
+    return fixed
 
-    if not place_piece(0, set()):
-        return None
 
-    result: Dict[int, List[List[List[int]]]] = {}
-    for i, size in enumerate(sizes_list):
-        coords = placed_shapes[i]
-        result.setdefault(size, []).append([[x,y,z] for (x,y,z) in coords])
-    return result
+def count_carvings(
+    grid_dims: Union[Tuple[int, int, int], Board],
+    rules: Dict[int, int],
+    max_nodes: Optional[int] = None,
+    time_limit: Optional[float] = None
+) -> CarveCount:
+    """Count every carving of the grid, and the distinct ones up to rotation of the grid."""
+    started = time.monotonic()
+    board = as_board(grid_dims)
+    sizes_list = sizes_for(rules, board.volume)
+    if sizes_list is None:
+        return CarveCount(COMPLETE)
+    symmetries = board.symmetries()
+    search = CarveSearch(board, sizes_list, max_nodes=max_nodes, time_limit=time_limit, exhaustive=True)
+    fixed = fixed_counts(board, symmetries, search.tilings())
+    status = COMPLETE if search.status == IMPOSSIBLE else search.status
+    return CarveCount(status, fixed[0], sum(fixed) // len(symmetries), fixed, search.nodes,
+                      time.monotonic() - started)
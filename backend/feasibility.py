@@ -0,0 +1,112 @@
+# Cheap pre-solve checks for Soma figures.
+# Each check proves a figure has no solution without searching, so the solve
+# endpoints can answer obviously impossible figures without spawning YASS.
+# check_figure() returns (rule, message) for the first failing rule, or None.
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from soma_solver import Figure, PIECE_CELLS, PIECE_NAMES
+
+RULE_VOLUME = 'volume'
+RULE_PREPLACED = 'preplaced'
+RULE_COMPONENTS = 'components'
+RULE_PARITY = 'parity'
+RULE_UNREACHABLE = 'unreachable'
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _piece_parity(name: str) -> int:
+    """|black - white| of a piece on a checkerboard coloring (the same for every placement)."""
+    return abs(sum(1 if (x + y + z) % 2 == 0 else -1 for x, y, z in PIECE_CELLS[name]))
+
+
+PIECE_PARITY: Dict[str, int] = {name: _piece_parity(name) for name in PIECE_CELLS}
+
+
+def _grow(figure: Figure, mask: int) -> int:
+    """mask plus its face neighbours (padding keeps shifts from wrapping rows)."""
+    sy, sz = figure.stride_y, figure.stride_z
+    return mask | mask << 1 | mask >> 1 | mask << sy | mask >> sy | mask << sz | mask >> sz
+
+
+def components(figure: Figure, region: int) -> List[int]:
+    """Split a cell mask into its face-connected components."""
+    out = []
+    while region:
+        comp = region & -region
+        while True:
+            grown = _grow(figure, comp) & region
+            if grown == comp:
+                break
+            comp = grown
+        out.append(comp)
+        region &= ~comp
+    return out
+
+
+def _can_partition(volumes: List[int], sizes: List[int]) -> bool:
+    """Can the piece sizes be split into groups summing exactly to each volume?"""
+    if not sizes:
+        return not any(volumes)
+    size, rest = sizes[0], sizes[1:]
+    tried = set()
+    for i, vol in enumerate(volumes):
+        if vol >= size and vol not in tried:
+            tried.add(vol)
+            volumes[i] -= size
+            ok = _can_partition(volumes, rest)
+            volumes[i] += size
+            if ok:
+                return True
+    return False
+
+
+def _achievable_imbalances(names: List[str]) -> set:
+    sums = {0}
+    for name in names:
+        d = PIECE_PARITY[name]
+        sums = {s + d for s in sums} | {s - d for s in sums}
+    return sums
+
+
+def check_figure(figure: Figure) -> Optional[Tuple[str, str]]:
+    """Return (rule, message) for the first rule the figure breaks, or None if it may be solvable."""
+    for name, mask in figure.preplaced.items():
+        if _popcount(mask) != len(PIECE_CELLS[name]):
+            return RULE_PREPLACED, (f"Pre-placed piece '{name}' has {_popcount(mask)} cubes "
+                                    f"instead of {len(PIECE_CELLS[name])}")
+
+    remaining = [p for p in PIECE_CELLS if p not in figure.preplaced]
+    sizes = sorted((len(PIECE_CELLS[p]) for p in remaining), reverse=True)
+    free = figure.free_mask
+    volume = _popcount(free)
+    if volume != sum(sizes):
+        return RULE_VOLUME, f"Figure has {volume} free cubicles, the remaining pieces need {sum(sizes)}"
+
+    black = 0
+    for bit, (x, y, z) in figure.coords.items():
+        if (x + y + z) % 2 == 0:
+            black |= 1 << bit
+    imbalance = _popcount(free & black) - _popcount(free & ~black)
+    if imbalance not in _achievable_imbalances(remaining):
+        return RULE_PARITY, f"Checkerboard imbalance {imbalance} cannot be covered by the remaining pieces"
+
+    volumes = [_popcount(c) for c in components(figure, free)]
+    if len(volumes) > 1 and not _can_partition(sorted(volumes, reverse=True), sizes):
+        return RULE_COMPONENTS, f"Separated regions of {volumes} cubicles cannot be filled by the remaining pieces"
+
+    table = figure.table()
+    placed = {PIECE_NAMES[p] for p in np.unique(table.piece)}
+    missing = [p for p in remaining if p not in placed]
+    if missing:
+        return RULE_UNREACHABLE, f"Piece(s) {''.join(missing)} fit nowhere in the figure"
+    unreachable = table.uncovered_cells()
+    if len(unreachable):
+        cells = [figure.coords[int(table.cell_bits[i])] for i in unreachable[:5]]
+        return RULE_UNREACHABLE, f"No piece placement can reach cubicle(s) {cells}"
+    return None
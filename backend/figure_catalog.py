@@ -0,0 +1,111 @@
+# In-memory catalog of the figures in yass/figures for /api/shapes.
+# Each .soma file is parsed once and remembered with its (mtime, size); a
+# refresh lists the directory and stats every file, re-parsing only files that
+# are new or changed and dropping ones that are gone. The JSON body and its
+# ETag are rebuilt only when something changed, so a repeat request costs at
+# most one directory poll (every poll_interval seconds) and usually a 304.
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from soma_grid import SomaGrid
+
+logger = logging.getLogger(__name__)
+
+FIGURES_DIR = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
+
+# Seconds between directory polls; a request in between serves the cached body.
+POLL_INTERVAL = 2.0
+
+
+def _shape_entry(figures_dir: str, file_name: str) -> Dict:
+    grid = SomaGrid.from_soma_file(os.path.join(figures_dir, file_name))
+    shape_id = os.path.splitext(file_name)[0]
+    return {
+        'id': shape_id,
+        'name': shape_id.replace('_', ' ').title(),
+        'file': file_name,
+        'dimensions': {
+            'width': grid.dimensions.width,
+            'height': grid.dimensions.height,
+            'depth': grid.dimensions.depth
+        },
+        'occupied_cells': len(grid.occupied_cells)
+    }
+
+
+class FigureCatalog:
+    """Shape metadata of a figures directory, kept current by polling file stats."""
+
+    def __init__(self, figures_dir: str = FIGURES_DIR, poll_interval: float = POLL_INTERVAL):
+        self.figures_dir = figures_dir
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        # file name -> ((mtime_ns, size), entry or None if it failed to parse)
+        self._files: Dict[str, Tuple[Tuple[int, int], Optional[Dict]]] = {}
+        self._shapes: List[Dict] = []
+        self._body = b'[]'
+        self._etag = ''
+        self._checked: Optional[float] = None
+        self.parses = 0
+
+    def refresh(self) -> bool:
+        """Re-stat the directory and re-parse changed files. Returns True if the catalog changed."""
+        with self._lock:
+            self._checked = time.monotonic()
+            changed = False
+            seen = set()
+            for file_name in os.listdir(self.figures_dir):
+                if not file_name.endswith('.soma'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.figures_dir, file_name))
+                except OSError:
+                    continue
+                seen.add(file_name)
+                signature = (st.st_mtime_ns, st.st_size)
+                known = self._files.get(file_name)
+                if known is not None and known[0] == signature:
+                    continue
+                try:
+                    entry = _shape_entry(self.figures_dir, file_name)
+                except Exception as e:
+                    logger.error(f"Error loading shape {file_name}: {str(e)}")
+                    entry = None
+                self.parses += 1
+                self._files[file_name] = (signature, entry)
+                changed = True
+            for file_name in set(self._files) - seen:
+                del self._files[file_name]
+                changed = True
+
+            if changed or not self._etag:
+                self._shapes = [entry for _, (_, entry) in sorted(self._files.items()) if entry is not None]
+                self._body = json.dumps(self._shapes, sort_keys=True, separators=(',', ':')).encode()
+                self._etag = hashlib.sha1(self._body).hexdigest()
+            return changed
+
+    def _maybe_refresh(self) -> None:
+        checked = self._checked
+        if checked is None or time.monotonic() - checked >= self.poll_interval:
+            self.refresh()
+
+    def snapshot(self) -> Tuple[bytes, str]:
+        """(JSON body, ETag) of the current shape list."""
+        self._maybe_refresh()
+        with self._lock:
+            return self._body, self._etag
+
+    def shapes(self) -> List[Dict]:
+        """Current shape list, sorted by file name."""
+        self._maybe_refresh()
+        with self._lock:
+            return list(self._shapes)
+
+
+figure_catalog = FigureCatalog()
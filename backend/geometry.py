@@ -0,0 +1,294 @@
+# Cube symmetry tables shared by the backend.
+# The 24 proper rotations (and the 48 rotations and reflections) are built once
+# as signed permutation matrices, identity first. Shapes are canonicalized
+# against them, and per bounding-box permutation tables let a whole grid be
+# rotated with one index gather: for a C-ordered array of dims (X, Y, Z), cell
+# (x, y, z) is flat index (x*Y + y)*Z + z, the carver's bit layout.
+
+from functools import lru_cache
+from itertools import permutations, product
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+Cell = Tuple[int, int, int]
+Matrix = Tuple[Tuple[int, int, int], ...]
+
+
+def det(M: Matrix) -> int:
+    return (M[0][0]*(M[1][1]*M[2][2]-M[1][2]*M[2][1]) -
+            M[0][1]*(M[1][0]*M[2][2]-M[1][2]*M[2][0]) +
+            M[0][2]*(M[1][0]*M[2][1]-M[1][1]*M[2][0]))
+
+
+def _signed_permutations() -> List[Tuple[Matrix, Tuple[int, int, int], Tuple[int, int, int]]]:
+    """(matrix, perm, signs) for every signed permutation: row i picks axis perm[i] times signs[i]."""
+    out = []
+    for perm in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            M = tuple(tuple(signs[i] if j == perm[i] else 0 for j in range(3)) for i in range(3))
+            out.append((M, perm, signs))
+    return out
+
+
+_ALL = _signed_permutations()
+_PROPER = [s for s in _ALL if det(s[0]) == 1]
+_IMPROPER = [s for s in _ALL if det(s[0]) == -1]
+
+# 24 rotations, then the 24 reflections; index i < 24 is proper.
+ROTATION_MATRICES: Tuple[Matrix, ...] = tuple(M for M, _, _ in _PROPER)
+SYMMETRY_MATRICES: Tuple[Matrix, ...] = ROTATION_MATRICES + tuple(M for M, _, _ in _IMPROPER)
+ROTATIONS_NP = np.array(ROTATION_MATRICES, dtype=np.int64)
+SYMMETRIES_NP = np.array(SYMMETRY_MATRICES, dtype=np.int64)
+
+# Axis/sign form of the same matrices: rotated[i] = signs[i] * cell[perm[i]].
+_AXES = tuple((perm, signs) for _, perm, signs in _PROPER + _IMPROPER)
+
+
+def rotate(cells: Iterable[Cell], index: int) -> List[Cell]:
+    """Cells under SYMMETRY_MATRICES[index] (no translation)."""
+    (p0, p1, p2), (s0, s1, s2) = _AXES[index]
+    return [(s0*c[p0], s1*c[p1], s2*c[p2]) for c in cells]
+
+
+def normalize(cells: Iterable[Cell]) -> Tuple[Cell, ...]:
+    """Sorted cells translated so the minimum corner is (0, 0, 0)."""
+    cells = list(cells)
+    xs, ys, zs = zip(*cells)
+    dx, dy, dz = min(xs), min(ys), min(zs)
+    return tuple(sorted((x-dx, y-dy, z-dz) for x, y, z in cells))
+
+
+def _forms(cells: Sequence[Cell], count: int):
+    """Normalized forms of cells under the first `count` symmetries."""
+    lo = [min(c[i] for c in cells) for i in range(3)]
+    hi = [max(c[i] for c in cells) for i in range(3)]
+    for (p0, p1, p2), (s0, s1, s2) in _AXES[:count]:
+        # the rotated minimum comes straight from the source bounds
+        l0 = lo[p0] if s0 > 0 else -hi[p0]
+        l1 = lo[p1] if s1 > 0 else -hi[p1]
+        l2 = lo[p2] if s2 > 0 else -hi[p2]
+        yield tuple(sorted((s0*c[p0]-l0, s1*c[p1]-l1, s2*c[p2]-l2) for c in cells))
+
+
+def orientations(cells: Iterable[Cell], reflections: bool = False) -> List[Tuple[Cell, ...]]:
+    """Distinct normalized rotations of a shape (with mirror images if reflections), in matrix order."""
+    seen = set()
+    out = []
+    for form in _forms(list(cells), 48 if reflections else 24):
+        if form not in seen:
+            seen.add(form)
+            out.append(form)
+    return out
+
+
+def canonical_form(cells: Iterable[Cell], reflections: bool = False) -> Tuple[Cell, ...]:
+    """Lexicographically smallest normalized form of a shape over all rotations (and reflections)."""
+    return min(_forms(list(cells), 48 if reflections else 24))
+
+
+# Packed shape ids.
+# shape_id() is a polycube's canonical form as one int: among its rotations
+# whose bounding box is dx <= dy <= dz, the smallest bitmask of its cells
+# (bit (x*dy + y)*dz + z, minimum corner at 0), packed with the box as
+#   mask << 15 | dx << 10 | dy << 5 | dz
+# Equal ids mean the same shape up to rotation; boxes up to 31 per axis.
+
+SHAPE_DIM_BITS = 5
+SHAPE_DIM_MASK = (1 << SHAPE_DIM_BITS) - 1
+
+# bounding-box extents -> rotations that turn them into ascending order
+_SORTING_ROTATIONS: Dict[Tuple[int, int, int], list] = {}
+
+
+def _sorting_rotations(ext: Tuple[int, int, int]) -> list:
+    rots = _SORTING_ROTATIONS.get(ext)
+    if rots is None:
+        rots = [(perm, signs) for perm, signs in _AXES[:len(ROTATION_MATRICES)]
+                if ext[perm[0]] <= ext[perm[1]] <= ext[perm[2]]]
+        _SORTING_ROTATIONS[ext] = rots
+    return rots
+
+
+def shape_id(cells: Iterable[Cell]) -> int:
+    """Packed canonical id of a polycube (any position or rotation)."""
+    cells = list(cells)
+    lo = [min(c[i] for c in cells) for i in range(3)]
+    hi = [max(c[i] for c in cells) for i in range(3)]
+    ext = (hi[0] - lo[0] + 1, hi[1] - lo[1] + 1, hi[2] - lo[2] + 1)
+    if max(ext) > SHAPE_DIM_MASK:
+        raise ValueError(f"Shape ids hold boxes up to {SHAPE_DIM_MASK} per axis, got {ext}")
+    best = None
+    for (p0, p1, p2), (s0, s1, s2) in _sorting_rotations(ext):
+        # s * c + o is the rotated coordinate with its minimum at 0
+        o0 = -lo[p0] if s0 > 0 else hi[p0]
+        o1 = -lo[p1] if s1 > 0 else hi[p1]
+        o2 = -lo[p2] if s2 > 0 else hi[p2]
+        d1, d2 = ext[p1], ext[p2]
+        mask = 0
+        for c in cells:
+            mask |= 1 << (((s0*c[p0] + o0)*d1 + s1*c[p1] + o1)*d2 + s2*c[p2] + o2)
+        if best is None or mask < best:
+            best = mask
+    dx, dy, dz = sorted(ext)
+    return best << (3*SHAPE_DIM_BITS) | dx << (2*SHAPE_DIM_BITS) | dy << SHAPE_DIM_BITS | dz
+
+
+def shape_dims(sid: int) -> Tuple[int, int, int]:
+    """Bounding box (dx, dy, dz) of a shape id."""
+    return sid >> (2*SHAPE_DIM_BITS) & SHAPE_DIM_MASK, sid >> SHAPE_DIM_BITS & SHAPE_DIM_MASK, sid & SHAPE_DIM_MASK
+
+
+def shape_cells(sid: int) -> Tuple[Cell, ...]:
+    """Cells of a shape id, sorted, minimum corner at (0, 0, 0)."""
+    _, dy, dz = shape_dims(sid)
+    mask = sid >> (3*SHAPE_DIM_BITS)
+    out = []
+    while mask:
+        low = mask & -mask
+        i = low.bit_length() - 1
+        out.append((i // (dy*dz), i // dz % dy, i % dz))
+        mask ^= low
+    return tuple(out)
+
+
+# rotation_tables entries kept; grid dims come from requests, so keep this bounded
+ROTATION_TABLES_MAX = 256
+
+
+@lru_cache(maxsize=ROTATION_TABLES_MAX)
+def rotation_tables(dims: Tuple[int, int, int], index: int) -> Tuple[Tuple[int, int, int], np.ndarray, np.ndarray]:
+    """
+    (rotated dims, image, gather) for turning a C-ordered (X, Y, Z) grid by
+    SYMMETRY_MATRICES[index]: flat cell i lands on image[i], and
+    grid.ravel()[gather].reshape(rotated dims) is the rotated grid.
+    """
+    idx = np.indices(dims).reshape(3, -1)
+    moved = SYMMETRIES_NP[index] @ idx
+    moved -= moved.min(axis=1, keepdims=True)
+    new_dims = tuple(int(d) for d in moved.max(axis=1) + 1)
+    image = np.ravel_multi_index(tuple(moved), new_dims)
+    gather = np.empty_like(image)
+    gather[image] = np.arange(image.size)
+    image.flags.writeable = False
+    gather.flags.writeable = False
+    return new_dims, image, gather
+
+
+def rotate_grid(grid: np.ndarray, index: int) -> np.ndarray:
+    """A 3-d array indexed [x, y, z] turned by SYMMETRY_MATRICES[index]."""
+    new_dims, _, gather = rotation_tables(tuple(grid.shape), index)
+    return grid.ravel()[gather].reshape(new_dims)
+
+
+# Batched canonicalization.
+# Shapes of k cells each, as an (N, k, 3) array, are turned by every matrix in
+# one gather. Each cell of a normalized form is coded as x << 2b | y << b | z
+# (b bits per coordinate, enough for 0..k-1), the codes are sorted, and the
+# sorted codes are packed first cell highest into one integer. Packed keys
+# order exactly like the sorted cell tuples, so the smallest key over the
+# rotations is canonical_form(). Keys fit in uint64 up to k = 7; larger
+# shapes get Python int keys (object arrays).
+
+BATCH_ROWS = 4096
+
+
+def _coord_bits(k: int) -> int:
+    return max(1, (k - 1).bit_length())
+
+
+def _pack_words(codes: np.ndarray, k: int) -> Tuple[np.ndarray, List[int]]:
+    """Sorted cell codes (..., k) packed into uint64 words (..., W), first word highest; also each word's bit width."""
+    cell_bits = 3 * _coord_bits(k)
+    per_word = 64 // cell_bits
+    words, widths = [], []
+    for start in range(0, k, per_word):
+        chunk = codes[..., start:start + per_word].astype(np.uint64)
+        word = np.zeros(chunk.shape[:-1], dtype=np.uint64)
+        for i in range(chunk.shape[-1]):
+            word = (word << np.uint64(cell_bits)) | chunk[..., i]
+        words.append(word)
+        widths.append(cell_bits * chunk.shape[-1])
+    return np.stack(words, axis=-1), widths
+
+
+def _join_words(words: np.ndarray, widths: List[int]) -> np.ndarray:
+    """Integer keys from packed words: uint64 for one word, Python ints (object) otherwise."""
+    if len(widths) == 1:
+        return words[..., 0]
+    keys = words[..., 0].astype(object)
+    for i in range(1, len(widths)):
+        keys = (keys << widths[i]) | words[..., i].astype(object)
+    return keys
+
+
+# Column of [cells - min, max - cells] each symmetry reads per output axis.
+_BATCH_COLUMNS = np.array([[p + (3 if sign < 0 else 0) for p, sign in zip(perm, signs)]
+                           for perm, signs in _AXES], dtype=np.intp)
+
+
+def _rotated_codes(shapes: np.ndarray, count: int) -> np.ndarray:
+    """Sorted cell codes (N, count, k) of every shape under the first `count` symmetries, normalized."""
+    k = shapes.shape[1]
+    b = _coord_bits(k)
+    # a signed axis permutation only picks and flips columns, so each
+    # normalized rotated coordinate is a column of cells - min or max - cells
+    lo = shapes.min(axis=1, keepdims=True)
+    hi = shapes.max(axis=1, keepdims=True)
+    both = np.concatenate([shapes - lo, hi - shapes], axis=2).astype(np.int32)
+    cols = _BATCH_COLUMNS[:count]
+    codes = (both[:, :, cols[:, 0]] << (2 * b)) | (both[:, :, cols[:, 1]] << b) | both[:, :, cols[:, 2]]
+    codes = codes.transpose(0, 2, 1).copy()
+    codes.sort(axis=2)
+    return codes
+
+
+def _as_shapes(shapes) -> np.ndarray:
+    shapes = np.asarray(shapes, dtype=np.int64)
+    if shapes.size == 0 and shapes.ndim < 3:  # [] or [[]]: an empty batch
+        shapes = shapes.reshape(0, 0, 3)
+    if shapes.ndim != 3 or shapes.shape[2] != 3:
+        raise ValueError("shapes must be an (N, k, 3) array")
+    return shapes
+
+
+def rotation_keys(shapes, reflections: bool = False) -> np.ndarray:
+    """(N, 24) packed keys of every shape's normalized rotations ((N, 48) with reflections)."""
+    shapes = _as_shapes(shapes)
+    count = len(SYMMETRY_MATRICES) if reflections else len(ROTATION_MATRICES)
+    k = shapes.shape[1]
+    parts = [_join_words(*_pack_words(_rotated_codes(shapes[i:i + BATCH_ROWS], count), k))
+             for i in range(0, len(shapes), BATCH_ROWS)]
+    if not parts:
+        return np.zeros((0, count), dtype=np.uint64)
+    return np.concatenate(parts)
+
+
+def canonical_keys(shapes, return_forms: bool = False):
+    """
+    Packed canonical keys (N,) of an (N, k, 3) batch of k-cell shapes; equal
+    keys mean the same shape up to rotation. With return_forms, also the
+    (N, k, 3) canonical forms (canonical_form(), cells in order).
+    """
+    shapes = _as_shapes(shapes)
+    n, k = shapes.shape[:2]
+    b = _coord_bits(k)
+    keys, forms = [], []
+    for i in range(0, n, BATCH_ROWS):
+        codes = _rotated_codes(shapes[i:i + BATCH_ROWS], len(ROTATION_MATRICES))
+        words, widths = _pack_words(codes, k)
+        # lexicographic minimum over the rotations, one word at a time
+        candidates = np.ones(words.shape[:2], dtype=bool)
+        for w in range(len(widths)):
+            col = np.where(candidates, words[..., w], np.iinfo(np.uint64).max)
+            candidates &= col == col.min(axis=1, keepdims=True)
+        rows = np.arange(len(words))
+        best = candidates.argmax(axis=1)
+        keys.append(_join_words(words[rows, best], widths))
+        if return_forms:
+            c = codes[rows, best]
+            forms.append(np.stack([c >> (2 * b), c >> b & ((1 << b) - 1), c & ((1 << b) - 1)], axis=-1))
+    keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint64)
+    if not return_forms:
+        return keys
+    return keys, (np.concatenate(forms) if forms else np.zeros((0, k, 3), dtype=np.int64))
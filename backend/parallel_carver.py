@@ -0,0 +1,179 @@
+# Parallel carving.
+# The search tree is split on the first piece: every distinct shape of the
+# largest size anchored at the grid's first cell is a subtree, and subtrees
+# are searched by separate processes. The first carving any worker finds is
+# returned and the remaining workers are told to stop.
+# Counting splits the exhaustive search the same way, over every size and
+# every fixed placement covering the first cell, and sums the per-symmetry
+# fixed counts the workers return.
+#   python parallel_carver.py X Y Z rules.txt [--workers N] [--time-limit S]
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple, Union
+
+from carver import (
+    Board, CarveCount, CarveResult, CarveSearch, SearchStopped, as_board, fixed_counts, sizes_for,
+    COMPLETE, FOUND, IMPOSSIBLE, NODE_BUDGET, TIME_BUDGET,
+)
+
+_stop = None
+
+
+def _init_worker(stop_event) -> None:
+    global _stop
+    _stop = stop_event
+
+
+def _carve_subtree(board: Board, sizes_list: List[int],
+                   first: Tuple[List[int], int, int],
+                   max_nodes: Optional[int], time_limit: Optional[float]):
+    """Pool worker: search one first-piece subtree. Returns (status, placed, nodes)."""
+    shape, mask, key = first
+    search = CarveSearch(board, sizes_list, max_nodes=max_nodes, time_limit=time_limit,
+                         stop=_stop.is_set if _stop is not None else None)
+    for tiling in search.tilings(filled=mask, remaining=tuple(sizes_list[1:]), used_keys=(key,),
+                                 placed=[(sizes_list[0], shape)]):
+        return FOUND, tiling, search.nodes
+    return search.status, None, search.nodes
+
+
+def carve_parallel(
+    grid_dims: Union[Tuple[int, int, int], Board],
+    rules: Dict[int, int],
+    max_workers: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    time_limit: Optional[float] = None
+) -> CarveResult:
+    """
+    carve() across a process pool. max_nodes applies to each subtree,
+    time_limit to the whole call.
+    """
+    started = time.monotonic()
+    board = as_board(grid_dims)
+    sizes_list = sizes_for(rules, board.volume)
+    if sizes_list is None:
+        return CarveResult(IMPOSSIBLE)
+    root = CarveSearch(board, sizes_list, time_limit=time_limit)
+    start = (board.full & -board.full).bit_length() - 1
+    try:
+        firsts = [c for c in root.candidates(0, start, sizes_list[0])
+                  if root.pockets_fillable(c[1], c[1], tuple(sizes_list[1:]))]
+    except SearchStopped:
+        return CarveResult(root.status, None, 1, time.monotonic() - started)
+
+    stop = multiprocessing.Event()
+    statuses = []
+    nodes = 1
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                             initializer=_init_worker, initargs=(stop,)) as pool:
+        pending = {pool.submit(_carve_subtree, board, sizes_list, first, max_nodes, time_limit)
+                   for first in firsts}
+        while pending:
+            remaining = None if time_limit is None else max(0.0, time_limit - (time.monotonic() - started))
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:  # out of time: let the workers see the stop flag
+                statuses.append(TIME_BUDGET)
+                break
+            for future in done:
+                status, tiling, n = future.result()
+                nodes += n
+                statuses.append(status)
+                if status == FOUND:
+                    stop.set()
+                    for other in pending:
+                        other.cancel()
+                    return CarveResult(FOUND, root.to_shapes(tiling), nodes,
+                                       time.monotonic() - started, len(sizes_list))
+        stop.set()
+        for other in pending:
+            other.cancel()
+
+    elapsed = time.monotonic() - started
+    if TIME_BUDGET in statuses:
+        return CarveResult(TIME_BUDGET, None, nodes, elapsed)
+    if NODE_BUDGET in statuses:
+        return CarveResult(NODE_BUDGET, None, nodes, elapsed)
+    return CarveResult(IMPOSSIBLE, None, nodes, elapsed)
+
+
+def _count_subtree(board: Board, sizes_list: List[int],
+                   first: Tuple[int, List[int], int, int], time_limit: Optional[float]):
+    """Pool worker: per-symmetry fixed counts of one first-piece subtree. Returns (status, fixed, nodes)."""
+    size, shape, mask, key = first
+    search = CarveSearch(board, sizes_list, time_limit=time_limit, exhaustive=True)
+    rest = list(sizes_list)
+    rest.remove(size)
+    fixed = fixed_counts(board, board.symmetries(),
+                         search.tilings(filled=mask, remaining=tuple(rest), used_keys=(key,),
+                                        placed=[(size, shape)]))
+    return search.status, fixed, search.nodes
+
+
+def count_carvings_parallel(
+    grid_dims: Union[Tuple[int, int, int], Board],
+    rules: Dict[int, int],
+    max_workers: Optional[int] = None,
+    time_limit: Optional[float] = None
+) -> CarveCount:
+    """count_carvings() across a process pool; time_limit applies to each subtree."""
+    started = time.monotonic()
+    board = as_board(grid_dims)
+    sizes_list = sizes_for(rules, board.volume)
+    if sizes_list is None:
+        return CarveCount(COMPLETE)
+    root = CarveSearch(board, sizes_list, time_limit=time_limit, exhaustive=True)
+    start = (board.full & -board.full).bit_length() - 1
+    firsts = []
+    try:
+        for size in sorted(set(sizes_list), reverse=True):
+            rest = list(sizes_list)
+            rest.remove(size)
+            firsts += [(size, shape, mask, key)
+                       for shape, mask, key in root.candidates(0, start, size, all_placements=True)
+                       if root.pockets_fillable(mask, mask, tuple(rest))]
+    except SearchStopped:
+        return CarveCount(root.status, nodes=1, elapsed=time.monotonic() - started)
+
+    symmetries = len(board.symmetries())
+    fixed = [0] * symmetries
+    nodes = 1
+    status = COMPLETE
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_count_subtree, board, sizes_list, first, time_limit) for first in firsts]
+        for future in futures:
+            sub_status, sub_fixed, sub_nodes = future.result()
+            fixed = [a + b for a, b in zip(fixed, sub_fixed)]
+            nodes += sub_nodes
+            if sub_status != IMPOSSIBLE:
+                status = sub_status
+    return CarveCount(status, fixed[0], sum(fixed) // symmetries, fixed, nodes, time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count the carvings a rules file admits for an X×Y×Z box.")
+    parser.add_argument('dims', type=int, nargs=3, metavar='N')
+    parser.add_argument('rules', help='rules file of "size: count" lines')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=None, help='seconds per subtree')
+    args = parser.parse_args()
+
+    rules: Dict[int, int] = {}
+    with open(args.rules) as f:
+        for line in f:
+            text = line.strip()
+            if text and not text.startswith('#'):
+                size, cnt = map(int, text.split(':'))
+                rules[size] = cnt
+
+    result = count_carvings_parallel(tuple(args.dims), rules, args.workers, args.time_limit)
+    print(f"status:            {result.status}")
+    print(f"carvings:          {result.tilings}")
+    print(f"up to rotation:    {result.distinct}  (Burnside over {len(result.fixed)} rotations, fixed {result.fixed})")
+    print(f"nodes:             {result.nodes}")
+    print(f"runtime:           {result.elapsed:.2f}s")
+    sys.exit(0 if result.status == COMPLETE else 1)
@@ -0,0 +1,230 @@
+# Parallel YASS solution counting.
+# The search tree is split on the placements of one piece: every placement of
+# the most constrained achiral piece becomes its own figure with that piece
+# pre-placed, and the sub-figures are counted by separate YASS processes
+# started from a thread pool (the threads only wait on YASS, so nothing is
+# forked from the web server's threads).
+# YASS reports solutions up to rotation/reflection of the figure, so only one
+# placement per symmetry orbit is counted (with `-r`, i.e. every solution) and
+# the orbit-weighted total is divided by the size of the figure's symmetry group.
+
+import os
+import re
+import time
+import logging
+import threading
+import subprocess
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from typing import Dict, List, Optional, Tuple
+
+import yass_runner
+from geometry import SYMMETRY_MATRICES, det
+from yass_runner import BACKEND_DIR
+from soma_solver import Figure, Cell, PIECE_CELLS
+
+logger = logging.getLogger(__name__)
+
+# Pieces whose mirror image is themselves; p and n swap under reflection, so a
+# p/n placement has no orbit of its own.
+ACHIRAL_PIECES = ('c', 'z', 't', 'l', '3')
+
+# Figures YASS counts within this many seconds are not worth splitting.
+SERIAL_BUDGET = 2.0
+
+_COUNT_RE = re.compile(r':\s+(\d+) solutions?\s*$')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def figure_symmetries(figure: Figure) -> List[Dict[Cell, Cell]]:
+    """
+    Cell maps of every rotation/reflection taking the figure onto itself.
+    Pre-placed letters must land on the same letter (p and n swap under reflection).
+    """
+    out = []
+    base = [min(c[i] for c in figure.cells) for i in range(3)]
+    for M in SYMMETRY_MATRICES:
+        moved = {c: tuple(M[i][0]*c[0] + M[i][1]*c[1] + M[i][2]*c[2] for i in range(3))
+                 for c in figure.cells}
+        lo = [min(m[i] for m in moved.values()) for i in range(3)]
+        mapping = {c: (m[0] - lo[0] + base[0], m[1] - lo[1] + base[1], m[2] - lo[2] + base[2])
+                   for c, m in moved.items()}
+        if set(mapping.values()) != set(figure.cells):
+            continue
+        swap = {'p': 'n', 'n': 'p'} if det(M) < 0 else {}
+        ok = True
+        for c, target in mapping.items():
+            ch, target_ch = figure.cells[c], figure.cells[target]
+            if ch in PIECE_CELLS or target_ch in PIECE_CELLS:
+                if swap.get(ch, ch) != target_ch:
+                    ok = False
+                    break
+        if ok:
+            out.append(mapping)
+    return out
+
+
+def _is_connected(figure: Figure) -> bool:
+    cells = set(figure.cells)
+    start = next(iter(cells))
+    seen = {start}
+    stack = [start]
+    while stack:
+        x, y, z = stack.pop()
+        for n in ((x+1, y, z), (x-1, y, z), (x, y+1, z), (x, y-1, z), (x, y, z+1), (x, y, z-1)):
+            if n in cells and n not in seen:
+                seen.add(n)
+                stack.append(n)
+    return len(seen) == len(cells)
+
+
+def _figure_text(figure: Figure, overrides: Dict[Cell, str]) -> str:
+    xs, ys, zs = zip(*figure.cells)
+    slices = []
+    for z in range(min(zs), max(zs) + 1):
+        rows = []
+        for y in range(min(ys), max(ys) + 1):
+            row = []
+            for x in range(min(xs), max(xs) + 1):
+                ch = overrides.get((x, y, z), figure.cells.get((x, y, z), '.'))
+                row.append(ch if ch in PIECE_CELLS or ch == '.' else 'o')
+            rows.append(''.join(row))
+        slices.append('\n'.join(rows))
+    return '\n\n'.join(slices) + '\n'
+
+
+def split_figure(figure: Figure) -> Optional[Tuple[List[Tuple[str, int]], int]]:
+    """
+    Sub-figures for a partitioned count: ([(figure_text, orbit_size), ...], |G|),
+    or None if the figure can't be split safely (separated shapes, which YASS
+    dedups per shape, or no free achiral piece to split on).
+    """
+    if not _is_connected(figure):
+        return None
+    for name, mask in figure.preplaced.items():
+        if bin(mask).count('1') != len(PIECE_CELLS[name]):
+            return None
+    remaining = [p for p in PIECE_CELLS if p not in figure.preplaced]
+    if bin(figure.free_mask).count('1') != sum(len(PIECE_CELLS[p]) for p in remaining):
+        return None  # let YASS report the bad cubicle count
+    candidates = [p for p in ACHIRAL_PIECES if p not in figure.preplaced]
+    if not candidates:
+        return None
+
+    by_piece: Dict[str, List[int]] = {p: [] for p in candidates}
+    for name, mask in figure.placements():
+        if name in by_piece:
+            by_piece[name].append(mask)
+    pivot = min(candidates, key=lambda p: len(by_piece[p]))
+
+    symmetries = figure_symmetries(figure)
+    seen = set()
+    subfigures = []
+    for mask in by_piece[pivot]:
+        if mask in seen:
+            continue
+        cells = figure.cells_of(mask)
+        orbit = {figure.mask_of(g[c] for c in cells) for g in symmetries}
+        seen |= orbit
+        subfigures.append((_figure_text(figure, {c: pivot for c in cells}), len(orbit)))
+    return subfigures, len(symmetries)
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _count_text(text: str, deadline: Optional[float] = None) -> Optional[int]:
+    """
+    Pool worker: every solution (rotations and reflections included) of one
+    sub-figure, or None if YASS failed, printed no count or ran past the deadline.
+    """
+    try:
+        result = subprocess.run(
+            [yass_runner.SOMA_EXECUTABLE, '-c', '-q', '-r', '-'],
+            input=text, cwd=BACKEND_DIR, capture_output=True, text=True,
+            timeout=_remaining(deadline)
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    match = _COUNT_RE.search(result.stdout)
+    if result.returncode != 0 or not match:
+        logger.warning(f"No count for a partitioned sub-figure: {(result.stdout + result.stderr).strip()}")
+        return None
+    return int(match.group(1))
+
+
+def get_pool():
+    """Thread pool shared by all partitioned counts in this process, one YASS run per CPU."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(os.cpu_count())
+        return _pool
+
+
+def count_partitioned(figure_text: str, pool=None, deadline: Optional[float] = None) -> Optional[int]:
+    """
+    Unique solution count of figure_text computed across the pool, or None if
+    it can't be split or some sub-figure could not be counted by the deadline.
+    """
+    try:
+        figure = Figure.from_text(figure_text)
+    except ValueError:
+        return None
+    split = split_figure(figure)
+    if split is None:
+        return None
+    subfigures, group_size = split
+    pool = pool or get_pool()
+    counts = pool.map(partial(_count_text, deadline=deadline), [text for text, _ in subfigures])
+    if None in counts:
+        return None
+    total = sum(count * orbit for count, (_, orbit) in zip(counts, subfigures))
+    if total % group_size:
+        # some solution is its own mirror/rotation image: orbits aren't all |G| long
+        logger.warning(f"Partitioned count {total} not divisible by symmetry group {group_size}")
+        return None
+    return total // group_size
+
+
+def count_solutions(path: str, pool=None, serial_budget: float = SERIAL_BUDGET,
+                    time_limit: Optional[float] = None) -> Tuple[Optional[int], str]:
+    """
+    Unique solution count of a figure file, as `soma -cq` reports it.
+    YASS gets serial_budget seconds on its own; figures that take longer are
+    re-counted partitioned across the pool, and counted serially again if the
+    partitioned count fails. time_limit, if given, bounds the whole call.
+    Returns (count or None, raw yass output or message).
+    """
+    path = os.path.abspath(path)
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    try:
+        try:
+            result = subprocess.run(
+                [yass_runner.SOMA_EXECUTABLE, '-cq', path],
+                cwd=os.path.join(BACKEND_DIR, 'yass'),
+                capture_output=True, text=True,
+                timeout=serial_budget if deadline is None else min(serial_budget, _remaining(deadline))
+            )
+        except subprocess.TimeoutExpired:
+            with open(path, 'r') as f:
+                text = f.read()
+            total = count_partitioned(text, pool, deadline)
+            if total is not None:
+                return total, f"{path}: {total} solutions (partitioned)"
+            result = subprocess.run(
+                [yass_runner.SOMA_EXECUTABLE, '-cq', path],
+                cwd=os.path.join(BACKEND_DIR, 'yass'),
+                capture_output=True, text=True, timeout=_remaining(deadline)
+            )
+    except subprocess.TimeoutExpired:
+        return None, f"{path}: counting took longer than {time_limit:g}s"
+
+    output = (result.stdout + result.stderr).strip()
+    match = _COUNT_RE.search(result.stdout)
+    if result.returncode != 0 or not match:
+        return None, output
+    return int(match.group(1)), output
@@ -1,16 +1,132 @@
 
 
 import os
+import json
+import math
 import shutil
 import subprocess
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 
-from carver import carve_pieces, canonical_key
+import numpy as np
+
+from carver import Board, carve, iter_carvings, FOUND, IMPOSSIBLE, TIME_BUDGET
+from geometry import canonical_keys, SHAPE_DIM_MASK
+from soma_solver import Figure
+from parallel_carver import carve_parallel
 
 polygen = Blueprint('polygen', __name__)
 
+FIGURES_DIR = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
+
+# Default wall-clock budget (seconds) for one carving request.
+CARVE_TIME_LIMIT = 30.0
+
+# Largest X, Y or Z a carving request may ask for; a Board's neighbour masks
+# grow with the square of its volume and are built before any budget applies.
+CARVE_MAX_DIM = 16
+
+# Carvings sent by /generateShapes/stream when no limit is given, and the cap.
+CARVE_STREAM_LIMIT = 10
+CARVE_STREAM_MAX = 1000
+
+
+def read_rules():
+    """Rules file ("size:count" lines) from the request. Returns (rules, None) or (None, error response)."""
+    f = request.files.get('rules')
+    if not f:
+        return None, (jsonify(error="Missing rules file"), 400)
+
+    rules: Dict[int,int] = {}
+    for line in f.stream:
+        text = line.decode().strip()
+        if not text or text.startswith('#'):
+            continue
+        try:
+            size, cnt = map(int, text.split(':'))
+        except ValueError:
+            return None, (jsonify(error=f"Bad line in rules: {text!r}"), 400)
+        if size < 1 or cnt < 0:
+            return None, (jsonify(error=f"Piece sizes must be at least 1 and counts not negative: {text!r}"), 400)
+        rules[size] = cnt
+    return rules, None
+
+
+def read_carving_request():
+    """
+    Rules file and X, Y, Z grid dims from the request form.
+    Returns (rules, (X, Y, Z), None) or (None, None, error response).
+    """
+    rules, error = read_rules()
+    if error:
+        return None, None, error
+
+    try:
+        X = int(request.form.get('X', 3))
+        Y = int(request.form.get('Y', 3))
+        Z = int(request.form.get('Z', 3))
+    except ValueError:
+        return None, None, (jsonify(error="X, Y, Z must be integers"), 400)
+    if not all(1 <= d <= CARVE_MAX_DIM for d in (X, Y, Z)):
+        return None, None, (jsonify(error=f"X, Y, Z must be between 1 and {CARVE_MAX_DIM}"), 400)
+
+    volume = X * Y * Z
+    if any(size > volume for size in rules):
+        return None, None, (jsonify(error="Cannot carve piece larger than volume"), 400)
+    return rules, (X, Y, Z), None
+
+
+def read_time_limit():
+    """
+    "time_limit" seconds from the request form, capped at CARVE_TIME_LIMIT.
+    Returns (seconds, None) or (None, error response).
+    """
+    try:
+        time_limit = float(request.form.get('time_limit', CARVE_TIME_LIMIT))
+    except ValueError:
+        return None, (jsonify(error="time_limit must be a number"), 400)
+    if not math.isfinite(time_limit) or time_limit <= 0:
+        return None, (jsonify(error="time_limit must be a positive number of seconds"), 400)
+    return min(time_limit, CARVE_TIME_LIMIT), None
+
+
+def carve_with_budget(grid_dims: Union[Tuple[int, int, int], Board], rules: Dict[int, int]):
+    """
+    Run carve() with the budget given in the request form ("time_limit"
+    seconds, capped at CARVE_TIME_LIMIT, and optional "max_nodes").
+    With "parallel" set, the search is split across a process pool
+    ("workers" processes, at most and by default one per CPU; max_nodes is
+    then per subtree).
+    Returns (shapes, None) or (None, error response).
+    """
+    time_limit, error = read_time_limit()
+    if error:
+        return None, error
+    try:
+        max_nodes = int(request.form['max_nodes']) if 'max_nodes' in request.form else None
+        workers = int(request.form['workers']) if 'workers' in request.form else None
+    except ValueError:
+        return None, (jsonify(error="max_nodes and workers must be integers"), 400)
+    if workers is not None:
+        if workers < 1:
+            return None, (jsonify(error="workers must be at least 1"), 400)
+        workers = min(workers, os.cpu_count() or 1)
+
+    if request.form.get('parallel', '').lower() in ('1', 'true', 'yes'):
+        result = carve_parallel(grid_dims, rules, max_workers=workers, max_nodes=max_nodes,
+                                time_limit=time_limit)
+    else:
+        result = carve(grid_dims, rules, max_nodes=max_nodes, time_limit=time_limit)
+    if result.status == FOUND:
+        return result.shapes, None
+    if result.status == IMPOSSIBLE:
+        return None, (jsonify(error="No valid carving found"), 400)
+    stats = dict(nodes=result.nodes, elapsed=round(result.elapsed, 3), best_depth=result.best_depth)
+    if result.status == TIME_BUDGET:
+        return None, (jsonify(error=f"Carving gave up after {time_limit:g}s", **stats), 408)
+    return None, (jsonify(error=f"Carving gave up after {max_nodes} nodes", **stats), 422)
+
 
 def write_single_soma(shape_coords: List[List[int]],filename: str,grid_size: Tuple[int, int, int]):
     """
@@ -41,53 +157,100 @@ def write_single_soma(shape_coords: List[List[int]],filename: str,grid_size: Tup
 
 @polygen.route('/generateShapes', methods=['POST'])
 def generate_shapes_endpoint():
-    f = request.files.get('rules')
-    if not f:
-        return jsonify(error="Missing rules file"), 400
-
-    rules: Dict[int,int] = {}
-    for line in f.stream:
-        text = line.decode().strip()
-        if not text or text.startswith('#'):
-            continue
-        try:
-            size, cnt = map(int, text.split(':'))
-        except ValueError:
-            return jsonify(error=f"Bad line in rules: {text!r}"), 400
-        rules[size] = cnt
-
-    try:
-        X = int(request.form.get('X', 3))
-        Y = int(request.form.get('Y', 3))
-        Z = int(request.form.get('Z', 3))
-    except ValueError:
-        return jsonify(error="X, Y, Z must be integers"), 400
-
-    volume = X * Y * Z
-    if any(size > volume for size in rules):
-        return jsonify(error="Cannot carve piece larger than volume"), 400
+    rules, grid_dims, error = read_carving_request()
+    if error:
+        return error
 
-    shapes = carve_pieces((X, Y, Z), rules)
-    if shapes is None:
-        return jsonify(error="No valid carving found"), 400
+    shapes, error = carve_with_budget(grid_dims, rules)
+    if error:
+        return error
 
     #sanity-check-collapse any remaining duplicates (should be none)
     deduped: Dict[int, List[List[List[int]]]] = {}
     for size, placements in shapes.items():
-        seen_keys = set()
-        unique = []
-        for coords in placements:
-            key = canonical_key(coords)
-            if key not in seen_keys:
-                seen_keys.add(key)
-                unique.append([list(c) for c in key])
-        deduped[size] = unique
+        keys, forms = canonical_keys(placements, return_forms=True)
+        _, first = np.unique(keys, return_index=True)
+        deduped[size] = forms[np.sort(first)].tolist()
 
     for size, needed in rules.items():
         if len(deduped.get(size, [])) < needed:
             return jsonify(error="No valid carving found"), 400
     return jsonify(deduped), 200
 
+
+@polygen.route('/generateShapes/figure/<shape_id>', methods=['POST'])
+def generate_shapes_for_figure(shape_id):
+    """
+    /api/generateShapes for an irregular target: carve the cubicles of
+    yass/figures/<shape_id>.soma instead of an X×Y×Z box. Takes the same
+    rules file and budget fields; shapes are in the figure's coordinates
+    (x = column, y = row, z = slice).
+    """
+    rules, error = read_rules()
+    if error:
+        return error
+    shape_file = os.path.join(FIGURES_DIR, f"{os.path.basename(shape_id)}.soma")
+    if not os.path.exists(shape_file):
+        return jsonify(error=f"Shape {shape_id} not found"), 404
+    try:
+        # parsed as YASS reads it: pre-placed letters are cubicles, comments are not
+        with open(shape_file, 'r') as f:
+            board = Board.for_cells(Figure.from_text(f.read()).cells)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    if any(size > board.volume for size in rules):
+        return jsonify(error="Cannot carve piece larger than volume"), 400
+    # pieces are keyed by geometry.shape_id, which holds boxes up to SHAPE_DIM_MASK
+    if max(board.dims) > SHAPE_DIM_MASK and any(size > SHAPE_DIM_MASK for size in rules):
+        return jsonify(error=f"Pieces larger than {SHAPE_DIM_MASK} cubes need a figure "
+                             f"at most {SHAPE_DIM_MASK} wide"), 400
+
+    shapes, error = carve_with_budget(board, rules)
+    if error:
+        return error
+    return jsonify(shapes), 200
+
+
+@polygen.route('/generateShapes/stream', methods=['POST'])
+def generate_shapes_stream():
+    """
+    Same form fields as /api/generateShapes, plus optional "seed" (random
+    branch order), "limit" (carvings to send, default 10) and "time_limit".
+    Streams distinct carvings (up to rotation of the whole grid) as NDJSON:
+      {"carving": 1, "shapes": {"4": [[[x, y, z], ...], ...], ...}}
+      ...
+      {"done": true, "carvings": N, "status": "limit" | "exhausted" | "time_budget"}
+    """
+    rules, grid_dims, error = read_carving_request()
+    if error:
+        return error
+    time_limit, error = read_time_limit()
+    if error:
+        return error
+    try:
+        seed = int(request.form['seed']) if 'seed' in request.form else None
+        limit = int(request.form.get('limit', CARVE_STREAM_LIMIT))
+    except ValueError:
+        return jsonify(error="seed and limit must be integers"), 400
+    if limit < 1:
+        return jsonify(error="limit must be at least 1"), 400
+    limit = min(limit, CARVE_STREAM_MAX)
+
+    def generate():
+        count = 0
+        status = 'limit'
+        for result in iter_carvings(grid_dims, rules, seed=seed, time_limit=time_limit):
+            if result.status != FOUND:
+                status = 'exhausted' if result.status == IMPOSSIBLE else result.status
+                break
+            count += 1
+            yield json.dumps({"carving": count, "shapes": result.shapes}) + "\n"
+            if count >= limit:
+                break
+        yield json.dumps({"done": True, "carvings": count, "status": status}) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @polygen.route('/solveGenerated', methods=['POST'])
 def solve_generated_endpoint():
     """
@@ -103,35 +266,14 @@ def solve_generated_endpoint():
 
     This has unsolvable bugs on Windows platforms as YASS is intended for macOS -Blake
     """
-    f = request.files.get('rules')
-    if not f:
-        return jsonify(error="Missing rules file"), 400
-
-    rules: Dict[int,int] = {}
-    for line in f.stream:
-        text = line.decode().strip()
-        if not text or text.startswith('#'):
-            continue
-        try:
-            size, cnt = map(int, text.split(':'))
-        except ValueError:
-            return jsonify(error=f"Bad line in rules: {text!r}"), 400
-        rules[size] = cnt
-
-    try:
-        X = int(request.form.get('X', 3))
-        Y = int(request.form.get('Y', 3))
-        Z = int(request.form.get('Z', 3))
-    except ValueError:
-        return jsonify(error="X, Y, Z must be integers"), 400
-
-    volume = X * Y * Z
-    if any(size > volume for size in rules):
-        return jsonify(error="Cannot carve piece larger than volume"), 400
-
-    shapes = carve_pieces((X, Y, Z), rules)
-    if shapes is None:
-        return jsonify(error="No valid carving found"), 400
+    rules, grid_dims, error = read_carving_request()
+    if error:
+        return error
+
+    shapes, error = carve_with_budget(grid_dims, rules)
+    if error:
+        return error
+    X, Y, Z = grid_dims
 
     base_dir = os.getcwd()  #project root
     yass_figures_tmp = os.path.join(base_dir, 'backend', 'yass', 'figures', 'tmp_gen')
@@ -3,7 +3,11 @@ from werkzeug.utils import secure_filename
 from typing import List, Set, Tuple, Dict
 import os
 
-polygen = Blueprint('polygen', __name__)
+import geometry
+import polycubes
+from polycube_catalog import DEFAULT_MAX_SIZE, catalog, polycube_shapes
+
+polygen = Blueprint('polycube_shapes', __name__)
 
 def parse_rules(stream) -> Dict[int, int]:
     """
@@ -13,7 +17,7 @@ def parse_rules(stream) -> Dict[int, int]:
     """
     rules = {}
     for raw in stream:
-        line = raw.strip()
+        line = (raw.decode() if isinstance(raw, bytes) else raw).strip()
         if not line or line.startswith('#'):
             continue
         size_str, count_str = line.split(':', 1)
@@ -27,91 +31,54 @@ def get_neighbors(cube: Tuple[int,int,int]) -> List[Tuple[int,int,int]]:
     x,y,z = cube
     return [(x+dx, y+dy, z+dz) for dx,dy,dz in _NEIGHBOR_OFFSETS]
 
-def _generate_rotations():
-    """Returns transformation functions f((x,y,z)) to (x',y',z')."""
-    mats = []
-    from itertools import permutations, product
-    for perm in permutations((0,1,2)):
-        for signs in product((1,-1), repeat=3):
-            M = [[0]*3 for _ in range(3)]
-            for i,axis in enumerate(perm):
-                M[i][axis] = signs[i]
-            det = (
-                M[0][0]*(M[1][1]*M[2][2]-M[1][2]*M[2][1]) -
-                M[0][1]*(M[1][0]*M[2][2]-M[1][2]*M[2][0]) +
-                M[0][2]*(M[1][0]*M[2][1]-M[1][1]*M[2][0])
-            )
-            if det == 1:
-                mats.append(M)
-    def make_rot(M):
-        def rot(cube):
-            x,y,z = cube
-            return (
-                M[0][0]*x + M[0][1]*y + M[0][2]*z,
-                M[1][0]*x + M[1][1]*y + M[1][2]*z,
-                M[2][0]*x + M[2][1]*y + M[2][2]*z,
-            )
-        return rot
-    return [make_rot(M) for M in mats]
-
-_ROTATIONS = _generate_rotations()
-
 def canonical_form(cubes: Set[Tuple[int,int,int]]) -> Tuple[Tuple[int,int,int], ...]:
     """
-    For each rotation:
-      1) rotate all coords
-      2) translate so min(x,y,z) = (0,0,0)
-      3) sort the list of coords
-    Return the lexicographically smallest tuple of coords.
+    Lexicographically smallest rotated, translated (min corner (0,0,0)) and
+    sorted tuple of coords; see geometry.canonical_form.
     """
-    forms = []
-    for rot in _ROTATIONS:
-        transformed = [rot(c) for c in cubes]
-        minx = min(x for x,y,z in transformed)
-        miny = min(y for x,y,z in transformed)
-        minz = min(z for x,y,z in transformed)
-        normalized = sorted((x-minx, y-miny, z-minz) for x,y,z in transformed)
-        forms.append(tuple(normalized))
-    return min(forms)
+    return geometry.canonical_form(cubes)
 
 def generate_polycubes(n: int) -> Set[Tuple[Tuple[int,int,int], ...]]:
     """
     Returns a set of canonical tuples, each representing a distinct shape.
+    Shapes come from the level-by-level enumeration in polycubes.py.
     """
-    seen: Set[Tuple[Tuple[int,int,int], ...]] = set()
-
-    def dfs(current: Set[Tuple[int,int,int]]):
-        if len(current) == n:
-            canon = canonical_form(current)
-            seen.add(canon)
-            return
-        for cube in list(current):
-            for nbr in get_neighbors(cube):
-                if nbr not in current:
-                    new_set = set(current)
-                    new_set.add(nbr)
-                    dfs(new_set)
+    _, forms = geometry.canonical_keys(polycubes.polycubes(n), return_forms=True)
+    return {tuple(map(tuple, form)) for form in forms.tolist()}
 
-    dfs({(0,0,0)})
-    return seen
-
-@polygen.route('/api/generateShapes', methods=['POST'])
+@polygen.route('/polycubes', methods=['POST'])
 def generate_shapes_endpoint():
     """
-    POST with form-data “rules” file.
-    Returns JSON: { size: [ [ [x,y,z], … ], … ], … }
+    POST /api/polycubes with form-data “rules” file (/api/generateShapes
+    carves an X×Y×Z box instead, see piece_carver.py).
+    Returns JSON: { size: [ [ [x,y,z], … ], … ], … }, the first `count`
+    shapes of each size in canonical order (see polycube_catalog.py).
+    Sizes must be within the catalog (1..8 by default) and counts non-negative.
     """
     if 'rules' not in request.files:
         return jsonify(error="Missing rules file"), 400
     f = request.files['rules']
     filename = secure_filename(f.filename)
-    rules = parse_rules(f.stream)
+    try:
+        rules = parse_rules(f.stream)
+    except ValueError:
+        return jsonify(error="Rules lines must look like 'size: count'"), 400
     result: Dict[int, List[List[List[int]]]] = {}
 
+    # only sizes the catalog holds are served; larger ones would be enumerated
+    # on the request thread
+    try:
+        max_size = catalog.max_size
+    except (OSError, ValueError):
+        max_size = DEFAULT_MAX_SIZE
+    for size, count in rules.items():
+        if not 1 <= size <= max_size:
+            return jsonify(error=f"Shape size must be between 1 and {max_size}, got {size}"), 400
+        if count < 0:
+            return jsonify(error=f"Shape count must not be negative, got {count}"), 400
+
     for size, count in rules.items():
-        all_shapes = list(generate_polycubes(size))
-        chosen = all_shapes[:count]
-        result[size] = [ [list(c) for c in shape] for shape in chosen ]
+        result[size] = polycube_shapes(size, count)
 
     return jsonify(result), 200
 
@@ -0,0 +1,196 @@
+# Per-figure placement tables.
+# A table lists every legal (piece, orientation, offset) placement in a figure's
+# free cells, the cells each placement covers (bit-packed over the figure's
+# free-cell index), and a per-cell index of the placements covering each cell.
+# Tables are cached in memory and on disk as .npz files keyed by a hash of the
+# figure, so the solver, the feasibility checks and counting start from a ready
+# table instead of recomputing geometry.
+
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from solve_cache import DEFAULT_CACHE_DIR, PIECE_LETTERS, trim_cache_dir
+from soma_solver import PIECE_NAMES, PIECE_ORIENTATIONS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the table layout or the key derivation changes.
+TABLE_VERSION = 1
+
+DEFAULT_TABLE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'placements')
+
+
+def figure_key(figure) -> str:
+    """Content address of a figure's cells (pre-placed letters included)."""
+    h = hashlib.sha256()
+    h.update(f"v{TABLE_VERSION}\0".encode())
+    for (x, y, z), ch in sorted(figure.cells.items()):
+        h.update(f"{x},{y},{z}{ch if ch in PIECE_LETTERS else 'o'};".encode())
+    return h.hexdigest()
+
+
+class PlacementTable:
+    """
+    Placements of one figure as parallel arrays (row = one placement):
+      piece        uint8   index into soma_solver.PIECE_NAMES
+      orientation  uint8   index into soma_solver.PIECE_ORIENTATIONS[piece]
+      offset       int16   (x, y, z) translation of the orientation
+      packed       uint8   covered free cells, np.packbits over the cell index
+    cell_bits maps the free-cell index to the figure's bit positions;
+    cell_ptr/cell_rows are the per-cell index (CSR: rows covering cell i are
+    cell_rows[cell_ptr[i]:cell_ptr[i + 1]]).
+    """
+
+    def __init__(self, cell_bits, piece, orientation, offset, packed):
+        self.cell_bits = np.asarray(cell_bits, dtype=np.int32)
+        self.piece = np.asarray(piece, dtype=np.uint8)
+        self.orientation = np.asarray(orientation, dtype=np.uint8)
+        self.offset = np.asarray(offset, dtype=np.int16).reshape(-1, 3)
+        self.packed = np.asarray(packed, dtype=np.uint8).reshape(len(self.piece), (len(self.cell_bits) + 7) // 8)
+        covered = np.unpackbits(self.packed, axis=1, count=len(self.cell_bits))
+        rows, cols = np.nonzero(covered)
+        self.cell_ptr = np.zeros(len(self.cell_bits) + 1, dtype=np.int32)
+        self.cell_ptr[1:] = np.cumsum(np.bincount(cols, minlength=len(self.cell_bits)))
+        self.cell_rows = rows[np.argsort(cols, kind='stable')].astype(np.int32)
+        self._rows, self._cols = rows.tolist(), cols.tolist()
+        self._row_cells: Optional[List[List[int]]] = None
+        self._placements: Optional[List[Tuple[str, int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.piece)
+
+    @classmethod
+    def build(cls, figure) -> 'PlacementTable':
+        free_bits = [b for b in sorted(figure.coords) if figure.free_mask >> b & 1]
+        index = {b: i for i, b in enumerate(free_bits)}
+        blocked = ~figure.free_mask
+        piece, orientation, offset, covered = [], [], [], []
+        for p, name in enumerate(PIECE_NAMES):
+            if name in figure.preplaced:
+                continue
+            for o, form in enumerate(PIECE_ORIENTATIONS[name]):
+                base = figure.mask_of(form)
+                form_bits = [figure.bit(c) for c in form]
+                ex, ey, ez = (max(c[i] for c in form) for i in range(3))
+                for tz in range(figure.size[2] - ez):
+                    for ty in range(figure.size[1] - ey):
+                        shift = ty * figure.stride_y + tz * figure.stride_z
+                        for tx in range(figure.size[0] - ex):
+                            if (base << (shift + tx)) & blocked:
+                                continue
+                            piece.append(p)
+                            orientation.append(o)
+                            offset.append((tx, ty, tz))
+                            covered.append([index[b + shift + tx] for b in form_bits])
+        cells = np.zeros((len(piece), len(free_bits)), dtype=bool)
+        for row, idx in enumerate(covered):
+            cells[row, idx] = True
+        return cls(free_bits, piece, orientation, offset, np.packbits(cells, axis=1))
+
+    def row_cells(self) -> List[List[int]]:
+        """Free cell indices covered by each row."""
+        if self._row_cells is None:
+            out: List[List[int]] = [[] for _ in range(len(self))]
+            for row, col in zip(self._rows, self._cols):
+                out[row].append(col)
+            self._row_cells = out
+        return self._row_cells
+
+    def placements(self) -> List[Tuple[str, int]]:
+        """(piece name, figure bitmask) per row, in row order."""
+        if self._placements is None:
+            bit_values = [1 << b for b in self.cell_bits.tolist()]
+            out = []
+            for p, cells in zip(self.piece.tolist(), self.row_cells()):
+                mask = 0
+                for i in cells:
+                    mask |= bit_values[i]
+                out.append((PIECE_NAMES[p], mask))
+            self._placements = out
+        return self._placements
+
+    def rows_covering(self, cell: int) -> np.ndarray:
+        """Rows covering free cell index `cell`."""
+        return self.cell_rows[self.cell_ptr[cell]:self.cell_ptr[cell + 1]]
+
+    def uncovered_cells(self) -> np.ndarray:
+        """Free cell indices no placement can reach."""
+        return np.flatnonzero(np.diff(self.cell_ptr) == 0)
+
+    def save(self, path: str) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, cell_bits=self.cell_bits, piece=self.piece, orientation=self.orientation,
+                     offset=self.offset, packed=self.packed)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'PlacementTable':
+        with np.load(path) as data:
+            return cls(data['cell_bits'], data['piece'], data['orientation'], data['offset'], data['packed'])
+
+
+class PlacementCache:
+    """
+    Memory LRU in front of a directory of .npz tables keyed by figure_key().
+    Like the solve cache's disk tier, the directory is trimmed (least recently
+    used first) whenever its total size exceeds max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_TABLE_DIR, max_entries: int = 256,
+                 max_disk_bytes: int = 32 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, PlacementTable]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, figure) -> PlacementTable:
+        key = figure_key(figure)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        path = os.path.join(self.cache_dir, f"{key}.npz")
+        try:
+            table = PlacementTable.load(path)
+            os.utime(path)  # least recently used tables are trimmed first
+            hit = True
+        except (OSError, ValueError, KeyError):
+            table = PlacementTable.build(figure)
+            hit = False
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                table.save(path)
+                trim_cache_dir(self.cache_dir, '.npz', self.max_disk_bytes)
+            except OSError as e:
+                logger.error(f"Error writing placement table {key}: {str(e)}")
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._memory[key] = table
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        return table
+
+
+placement_cache = PlacementCache()
+
+
+def placement_table(figure) -> PlacementTable:
+    """The (cached) placement table of a parsed figure."""
+    return placement_cache.get(figure)
@@ -0,0 +1,170 @@
+# Prebuilt catalog of free polycubes.
+# One binary file holds, per size n, every free n-cube (one per rotation class)
+# as fixed-size records, so a lookup is a slice of a memory-mapped file:
+#   header   8s magic, u32 version, u32 max size
+#   index    max size entries of (u64 offset, u32 count, u32 record size)
+#   records  n little-endian u16 cells (x | y << 4 | z << 8, in
+#            geometry.canonical_form order), u8 distinct orientations,
+#            u8 flags (FLAG_ACHIRAL: the mirror image is the same shape)
+# Shapes are sorted by canonical form within a size. Sizes past the catalog
+# are enumerated with polycubes.py.
+#   python polycube_catalog.py [MAX_N]     rebuild polycube_catalog.bin
+
+import os
+import sys
+import mmap
+import struct
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import geometry
+import polycubes
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SOMAPCUB'
+# Bump when the record layout or the shape order changes.
+CATALOG_VERSION = 1
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), 'polycube_catalog.bin')
+DEFAULT_MAX_SIZE = 8
+
+FLAG_ACHIRAL = 1
+
+COORD_BITS = 4
+COORD_MASK = (1 << COORD_BITS) - 1
+MAX_SIZE = 1 << COORD_BITS   # an n-cube spans at most n cells along an axis
+
+_HEADER = struct.Struct('<8sII')
+_ENTRY = struct.Struct('<QII')
+
+
+def record_dtype(n: int) -> np.dtype:
+    return np.dtype([('cells', '<u2', (n,)), ('orientations', 'u1'), ('flags', 'u1')])
+
+
+def _canonical_shapes(n: int) -> np.ndarray:
+    """(count, n, 3) canonical forms of the free n-cubes, sorted."""
+    keys, forms = geometry.canonical_keys(polycubes.polycubes(n), return_forms=True)
+    return forms[np.argsort(keys, kind='stable')]
+
+
+def _records(n: int) -> np.ndarray:
+    """Catalog records of the free n-cubes, sorted by canonical form."""
+    shapes = _canonical_shapes(n)
+    keys = geometry.rotation_keys(shapes, reflections=True)
+    rotations = len(geometry.ROTATION_MATRICES)
+    proper = np.sort(keys[:, :rotations], axis=1)
+    out = np.zeros(len(shapes), dtype=record_dtype(n))
+    out['cells'] = shapes[..., 0] | shapes[..., 1] << COORD_BITS | shapes[..., 2] << (2*COORD_BITS)
+    out['orientations'] = 1 + (proper[:, 1:] != proper[:, :-1]).sum(axis=1)
+    # achiral: some reflection lands on the canonical (smallest proper) key
+    out['flags'] = np.where(keys[:, rotations:].min(axis=1) == proper[:, 0], FLAG_ACHIRAL, 0)
+    return out
+
+
+def build(path: str = DEFAULT_CATALOG_PATH, max_size: int = DEFAULT_MAX_SIZE) -> None:
+    """Enumerate sizes 1..max_size and write the catalog atomically."""
+    if not 1 <= max_size <= MAX_SIZE:
+        raise ValueError(f"Catalog sizes must be 1..{MAX_SIZE}")
+    tables = [_records(n) for n in range(1, max_size + 1)]
+    offset = _HEADER.size + _ENTRY.size * max_size
+    index = []
+    for table in tables:
+        index.append(_ENTRY.pack(offset, len(table), table.dtype.itemsize))
+        offset += table.nbytes
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, CATALOG_VERSION, max_size))
+        f.write(b''.join(index))
+        for table in tables:
+            f.write(table.tobytes())
+    os.replace(tmp_path, path)
+
+
+class PolycubeCatalog:
+    """
+    Read-only view of a catalog file. The file is memory-mapped on first use
+    and each size's records are a zero-copy NumPy view, so a lookup touches
+    only the pages of the shapes it returns.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._index: List[Tuple[int, int, int]] = []
+        self._views: Dict[int, np.ndarray] = {}
+
+    def _open(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                return
+            with open(self.path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, max_size = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != CATALOG_VERSION:
+                mm.close()
+                raise ValueError(f"{self.path}: not a version {CATALOG_VERSION} polycube catalog")
+            self._index = [_ENTRY.unpack_from(mm, _HEADER.size + i * _ENTRY.size) for i in range(max_size)]
+            self._mmap = mm
+
+    @property
+    def max_size(self) -> int:
+        self._open()
+        return len(self._index)
+
+    def __contains__(self, n: int) -> bool:
+        return 1 <= n <= self.max_size
+
+    def records(self, n: int) -> np.ndarray:
+        """Records of the free n-cubes (fields cells, orientations, flags)."""
+        view = self._views.get(n)
+        if view is None:
+            if n not in self:
+                raise KeyError(n)
+            offset, count, size = self._index[n - 1]
+            dtype = record_dtype(n)
+            if size != dtype.itemsize:
+                raise ValueError(f"{self.path}: bad record size {size} for n={n}")
+            view = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            self._views[n] = view
+        return view
+
+    def count(self, n: int) -> int:
+        return len(self.records(n))
+
+    def shapes(self, n: int, count: Optional[int] = None) -> List[List[List[int]]]:
+        """The first `count` (default all) free n-cubes as lists of [x, y, z]."""
+        cells = self.records(n)['cells'][:count].astype(np.int64)
+        coords = np.stack([cells & COORD_MASK, cells >> COORD_BITS & COORD_MASK,
+                           cells >> (2*COORD_BITS)], axis=-1)
+        return coords.tolist()
+
+
+catalog = PolycubeCatalog()
+
+
+def polycube_shapes(n: int, count: Optional[int] = None) -> List[List[List[int]]]:
+    """
+    The first `count` free n-cubes in canonical form order, from the catalog
+    when it holds size n and enumerated otherwise.
+    """
+    try:
+        if n in catalog:
+            return catalog.shapes(n, count)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading polycube catalog: {str(e)}")
+    return _canonical_shapes(n)[:count].tolist()
+
+
+if __name__ == "__main__":
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_SIZE
+    build(DEFAULT_CATALOG_PATH, max_size)
+    for n in range(1, max_size + 1):
+        print(f"n={n}: {catalog.count(n)} shapes")
+    print(f"{DEFAULT_CATALOG_PATH}: {os.path.getsize(DEFAULT_CATALOG_PATH)} bytes")
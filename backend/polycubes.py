@@ -0,0 +1,69 @@
+# Free polycube enumeration.
+# Polycubes are grown one level at a time: each free n-cube (one per rotation
+# class) gets every empty neighbour cell added in turn, and the (n+1)-cube
+# children are deduplicated by their packed shape id (geometry.shape_id), so
+# no cell sets are copied along the way and each child is canonicalized once.
+# Levels are cached; with processes > 1 the parents of a level are split across
+# a process pool and the children merged.
+#   python bench_polycubes.py      counts up to n=10 against the known values
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+from geometry import shape_cells, shape_id
+
+Cell = Tuple[int, int, int]
+
+
+def _grow(parents: List[int]) -> Set[int]:
+    """Shape ids of every one-cube extension of the given polycubes."""
+    children = set()
+    for key in parents:
+        cells = shape_cells(key)
+        occupied = set(cells)
+        tried = set()
+        for x, y, z in cells:
+            for nb in ((x+1, y, z), (x-1, y, z), (x, y+1, z), (x, y-1, z), (x, y, z+1), (x, y, z-1)):
+                if nb not in occupied and nb not in tried:
+                    tried.add(nb)
+                    children.add(shape_id(cells + (nb,)))
+    return children
+
+
+# _LEVELS[n - 1]: sorted shape ids of the free n-cubes found so far
+_LEVELS: List[List[int]] = [[shape_id([(0, 0, 0)])]]
+# held while a level is grown, so concurrent callers never append one twice
+_levels_lock = threading.Lock()
+
+
+def free_polycubes(n: int, processes: Optional[int] = None) -> List[int]:
+    """
+    Shape ids (geometry.shape_id) of the free polycubes of n cubes, one per class
+    under rotation, in id order. processes > 1 grows each missing level
+    across a process pool (0 means one process per CPU).
+    """
+    if n < 1:
+        return []
+    if len(_LEVELS) < n:
+        with _levels_lock:
+            while len(_LEVELS) < n:
+                parents = _LEVELS[-1]
+                workers = os.cpu_count() if processes == 0 else (processes or 1)
+                if workers > 1 and len(parents) >= 4 * workers:
+                    chunk = -(-len(parents) // (4 * workers))
+                    children: Set[int] = set()
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        for part in pool.map(_grow, [parents[i:i + chunk]
+                                                     for i in range(0, len(parents), chunk)]):
+                            children |= part
+                else:
+                    children = _grow(parents)
+                _LEVELS.append(sorted(children))
+    return _LEVELS[n - 1]
+
+
+def polycubes(n: int, processes: Optional[int] = None) -> List[Tuple[Cell, ...]]:
+    """Cells of every free n-cube (geometry.shape_cells), in id order."""
+    return [shape_cells(key) for key in free_polycubes(n, processes)]
@@ -0,0 +1,163 @@
+"""
+Precomputed total-solution counts for every figure in yass/figures.
+
+Build or refresh the index offline (only figures whose content hash changed are
+re-counted, in parallel across cores; figures that take YASS longer than
+parallel_count.SERIAL_BUDGET are themselves split across parallel YASS runs):
+
+    python solution_index.py [--workers N] [--force]
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from yass_runner import BACKEND_DIR
+from parallel_count import count_solutions
+import yass_runner
+
+logger = logging.getLogger(__name__)
+
+FIGURES_DIR = os.path.join(BACKEND_DIR, 'yass', 'figures')
+INDEX_FILE = os.path.join(BACKEND_DIR, 'solutions', 'total_solutions_index.json')
+
+# Seconds a request may spend counting a figure that is not in the index.
+LIVE_COUNT_LIMIT = 10.0
+
+_index_lock = threading.Lock()
+_index_cache: Dict = {}
+_index_mtime: Optional[float] = None
+# figure path -> ((mtime_ns, size), sha256) of the last hash taken
+_figure_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def figure_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def current_figure_hash(path: str) -> str:
+    """figure_hash(path), re-read only when the file's mtime or size changed."""
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    with _index_lock:
+        known = _figure_hashes.get(path)
+    if known is not None and known[0] == signature:
+        return known[1]
+    digest = figure_hash(path)
+    with _index_lock:
+        _figure_hashes[path] = (signature, digest)
+    return digest
+
+
+def count_figure(path: str, time_limit: Optional[float] = None) -> Tuple[Optional[int], str]:
+    """
+    Unique solution count of a figure file. Returns (count or None, raw yass output).
+    Long counts are split into parallel YASS runs (see parallel_count); with
+    time_limit, the count gives up (None) after that many seconds.
+    """
+    return count_solutions(path, time_limit=time_limit)
+
+
+def load_index(path: str = INDEX_FILE) -> Dict:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(index: Dict, path: str = INDEX_FILE) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def build_index(figures_dir: str = FIGURES_DIR, path: str = INDEX_FILE,
+                workers: Optional[int] = None, force: bool = False) -> Dict:
+    """
+    Count every .soma figure whose content hash is not already in the index.
+    Entries for deleted figures are dropped.
+    """
+    index = {} if force else load_index(path)
+    stale: Dict[str, Tuple[str, str]] = {}
+    current = set()
+
+    for file_name in sorted(os.listdir(figures_dir)):
+        if not file_name.endswith('.soma'):
+            continue
+        shape_id = os.path.splitext(file_name)[0]
+        file_path = os.path.join(figures_dir, file_name)
+        digest = figure_hash(file_path)
+        current.add(shape_id)
+        entry = index.get(shape_id)
+        if entry is None or entry.get('sha256') != digest:
+            stale[shape_id] = (file_path, digest)
+
+    for shape_id in set(index) - current:
+        del index[shape_id]
+
+    def work(item):
+        shape_id, (file_path, digest) = item
+        total, output = count_figure(file_path)
+        return shape_id, digest, total, output
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for shape_id, digest, total, output in pool.map(work, stale.items()):
+            entry = {'sha256': digest, 'total_solutions': total}
+            if total is None:
+                entry['message'] = output
+                logger.warning(f"No solution count for {shape_id}: {output}")
+            index[shape_id] = entry
+
+    save_index(index, path)
+    logger.info(f"Solution index: {len(stale)} counted, {len(index)} total")
+    return index
+
+
+def lookup_total_solutions(shape_id: str) -> Tuple[bool, Optional[int]]:
+    """
+    Look shape_id up in the index. Returns (indexed, total_solutions); indexed is
+    False when the figure is missing from the index or changed since it was
+    counted. An indexed figure YASS rejected has a total of None. The figure is
+    only re-hashed when its mtime or size changed since the last lookup.
+    """
+    global _index_cache, _index_mtime
+    try:
+        mtime = os.path.getmtime(INDEX_FILE)
+    except OSError:
+        return False, None
+    with _index_lock:
+        if mtime != _index_mtime:
+            _index_cache = load_index()
+            _index_mtime = mtime
+        entry = _index_cache.get(shape_id)
+    if entry is None:
+        return False, None
+
+    file_path = os.path.join(FIGURES_DIR, f"{shape_id}.soma")
+    try:
+        if current_figure_hash(file_path) != entry['sha256']:
+            return False, None
+    except OSError:
+        return False, None
+    return True, entry['total_solutions']
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build the total-solutions index")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="re-count every figure")
+    parser.add_argument('--soma', default=None, help="path to the yass soma executable")
+    args = parser.parse_args()
+    if args.soma:
+        yass_runner.SOMA_EXECUTABLE = os.path.abspath(args.soma)
+    build_index(workers=args.workers, force=args.force)
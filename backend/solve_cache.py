@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import tempfile
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload or the key derivation changes.
+CACHE_VERSION = 1
+
+PIECE_LETTERS = {'c', 'p', 'n', 'z', 't', 'l', '3'}
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'solutions', 'cache')
+
+
+def normalize_figure(text: str) -> str:
+    """
+    Reduce YASS figure text to a canonical spelling so that trivially different
+    submissions of the same figure share a cache entry:
+      - '#' comments and trailing spaces are dropped
+      - ' ' and '.' are both empty space, any non-piece cubicle char becomes 'o'
+      - runs of blank (or comment-only) lines collapse to one slice separator
+    Tab characters are left alone because YASS rejects them.
+    """
+    slices: list = []
+    current: list = []
+    for raw in text.replace('\r\n', '\n').split('\n'):
+        line = raw.split('#', 1)[0].rstrip(' ')
+        if not line:
+            if current:
+                slices.append(current)
+                current = []
+            continue
+        row = []
+        for ch in line:
+            if ch in (' ', '.'):
+                row.append('.')
+            elif ch in PIECE_LETTERS or ch == '\t':
+                row.append(ch)
+            else:
+                row.append('o')
+        current.append(''.join(row))
+    if current:
+        slices.append(current)
+    return '\n\n'.join('\n'.join(rows) for rows in slices)
+
+
+def cache_key(figure_text: str, flags: Sequence[str]) -> str:
+    """Content address for a figure solved with the given YASS flags."""
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}\0".encode())
+    h.update(' '.join(flags).encode())
+    h.update(b'\0')
+    h.update(normalize_figure(figure_text).encode())
+    return h.hexdigest()
+
+
+def trim_cache_dir(cache_dir: str, suffix: str, max_bytes: int) -> None:
+    """
+    Delete the least recently used (oldest mtime) files ending in suffix from
+    cache_dir until the rest total at most max_bytes. Readers touch the files
+    they use, so mtime order is use order.
+    """
+    entries = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(suffix):
+            try:
+                st = entry.stat()
+            except OSError:  # removed by another worker
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _mtime, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+class SolveCache:
+    """
+    Two-tier cache of YASS stdout keyed by cache_key().
+    The memory tier is an LRU bounded by entry count, the disk tier lives under
+    backend/solutions/cache and is trimmed (least recently used first) whenever
+    its total size exceeds max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 512,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                stdout = json.load(f)['stdout']
+            os.utime(path)  # mark as recently used for disk eviction
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, stdout)
+        return stdout
+
+    def put(self, key: str, stdout: str) -> None:
+        with self._lock:
+            self._remember(key, stdout)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'stdout': stdout}, f)
+            os.replace(tmp_path, self._path(key))
+            trim_cache_dir(self.cache_dir, '.json', self.max_disk_bytes)
+        except OSError as e:
+            logger.error(f"Error writing solve cache entry {key}: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def _remember(self, key: str, stdout: str) -> None:
+        self._memory[key] = stdout
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+solve_cache = SolveCache()
@@ -0,0 +1,285 @@
+import os
+import re
+import math
+import time
+import uuid
+import signal
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from flask import Blueprint, request, jsonify
+
+from solve_cache import solve_cache, cache_key
+from yass_runner import BACKEND_DIR
+import yass_runner
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process CPU limit
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+jobs = Blueprint('jobs', __name__)
+
+# YASS flags per job kind
+JOB_KINDS: Dict[str, List[str]] = {
+    'count': ['-c', '-q'],
+    'solve': ['-q'],
+    'all': ['-a', '-q'],
+}
+
+FINISHED = {'done', 'failed', 'cancelled', 'timeout'}
+
+_COUNT_RE = re.compile(r':\s+(\d+) solutions?\s*$')
+
+
+@dataclass
+class Job:
+    """One queued YASS run."""
+    id: str
+    kind: str
+    figure: str
+    wall_limit: float
+    cpu_limit: int
+    status: str = 'queued'
+    output: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    last_polled: float = field(default_factory=time.time)
+    proc: Optional[subprocess.Popen] = None
+
+    def to_dict(self) -> Dict:
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+        if self.error:
+            data['error'] = self.error
+        return data
+
+    def result(self) -> Dict:
+        if self.kind == 'count':
+            match = _COUNT_RE.search(self.output or '')
+            return {'total_solutions': int(match.group(1)) if match else None,
+                    'output': self.output}
+        return {'output': self.output}
+
+
+class JobManager:
+    """
+    Runs YASS jobs on a bounded pool so web workers never wait on a solve.
+    Every job gets a wall-clock limit and (where supported) an RLIMIT_CPU limit;
+    jobs nobody has polled for idle_timeout seconds are cancelled, and finished
+    jobs are forgotten after retention seconds.
+    Jobs live in this process only, so poll the worker that accepted the job.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, wall_limit: float = 60.0,
+                 cpu_limit: int = 60, idle_timeout: float = 30.0, retention: float = 300.0):
+        self.wall_limit = wall_limit
+        self.cpu_limit = cpu_limit
+        self.idle_timeout = idle_timeout
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                        thread_name_prefix='yass-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper.start()
+
+    def submit(self, figure: str, kind: str = 'count', wall_limit: Optional[float] = None,
+               cpu_limit: Optional[int] = None) -> Job:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        if wall_limit is not None and not (math.isfinite(wall_limit) and wall_limit > 0):
+            raise ValueError("wall_limit must be a positive number of seconds")
+        if cpu_limit is not None and cpu_limit <= 0:
+            raise ValueError("cpu_limit must be a positive number of seconds")
+        job = Job(
+            id=uuid.uuid4().hex, kind=kind, figure=figure,
+            wall_limit=self.wall_limit if wall_limit is None else min(wall_limit, self.wall_limit),
+            cpu_limit=self.cpu_limit if cpu_limit is None else min(cpu_limit, self.cpu_limit),
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+
+        cached = solve_cache.get(cache_key(figure, JOB_KINDS[kind]))
+        if cached is not None:
+            job.output = cached
+            job.status = 'done'
+            job.started = job.finished = time.time()
+        else:
+            self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.last_polled = time.time()
+            return job
+
+    def cancel(self, job_id: str, status: str = 'cancelled') -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job.status = status
+            job.finished = time.time()
+            proc = job.proc
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+        return job
+
+    @staticmethod
+    def _command(flags: List[str], cpu_limit: int) -> List[str]:
+        """
+        YASS command line for a job. Where CPU limits exist, the limit is set
+        by a shell that then execs YASS: preexec_fn is not safe to use from
+        the threads of a threaded server.
+        """
+        command = [yass_runner.SOMA_EXECUTABLE, *flags, '-']
+        if resource is None:
+            return command
+        # soft limit sends SIGXCPU (reported as a timeout), the hard one SIGKILL
+        limits = f'ulimit -S -t {int(cpu_limit)} && ulimit -H -t {int(cpu_limit) + 1}'
+        return ['/bin/sh', '-c', f'{limits} && exec "$0" "$@"', *command]
+
+    def _run(self, job: Job) -> None:
+        flags = JOB_KINDS[job.kind]
+        with self._lock:
+            if job.status != 'queued':
+                return
+            job.status = 'running'
+            job.started = time.time()
+            try:
+                job.proc = subprocess.Popen(
+                    self._command(flags, job.cpu_limit),
+                    cwd=BACKEND_DIR,
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    text=True
+                )
+            except OSError as e:
+                job.status, job.error, job.finished = 'failed', str(e), time.time()
+                return
+
+        try:
+            stdout, stderr = job.proc.communicate(job.figure, timeout=job.wall_limit)
+        except subprocess.TimeoutExpired:
+            job.error = f"Exceeded wall-clock limit of {job.wall_limit:g}s"
+            self.cancel(job.id, status='timeout')
+            job.proc.communicate()
+            job.proc = None
+            return
+
+        with self._lock:
+            returncode = job.proc.returncode
+            job.proc = None
+            if job.status != 'running':  # cancelled while running
+                return
+            job.finished = time.time()
+            if resource is not None and returncode == -signal.SIGXCPU:
+                job.status = 'timeout'
+                job.error = f"Exceeded CPU limit of {job.cpu_limit}s"
+            elif returncode != 0:
+                job.status = 'failed'
+                job.error = stderr.strip() or f"yass exited with status {returncode}"
+            else:
+                job.status = 'done'
+                job.output = stdout
+
+        if job.status == 'done':
+            solve_cache.put(cache_key(job.figure, flags), stdout)
+
+    def _reap_loop(self) -> None:
+        while True:
+            time.sleep(1.0)
+            now = time.time()
+            with self._lock:
+                items = list(self._jobs.values())
+            for job in items:
+                if job.status not in FINISHED and now - job.last_polled > self.idle_timeout:
+                    logger.info(f"Cancelling unpolled job {job.id}")
+                    self.cancel(job.id)
+                elif job.status in FINISHED and now - (job.finished or now) > self.retention:
+                    with self._lock:
+                        self._jobs.pop(job.id, None)
+
+
+job_manager = JobManager()
+
+
+@jobs.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    POST JSON {"cube": "<figure text>"} or {"shape_id": "<figure name>"},
+    plus optional "kind" (count | solve | all), "wall_limit" and "cpu_limit" seconds.
+    Returns 202 with the job id; poll GET /api/jobs/<id>.
+    """
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    figure = data.get('cube')
+    if figure is None and 'shape_id' in data:
+        if not isinstance(data['shape_id'], str):
+            return jsonify({"error": "shape_id must be a string"}), 400
+        figures_dir = os.path.join(BACKEND_DIR, 'yass', 'figures')
+        shape_file = os.path.join(figures_dir, f"{os.path.basename(data['shape_id'])}.soma")
+        if not os.path.exists(shape_file):
+            return jsonify({"error": f"Shape {data['shape_id']} not found"}), 404
+        with open(shape_file, 'r') as f:
+            figure = f.read()
+    if figure is None:
+        return jsonify({"error": "Missing cube data or shape_id"}), 400
+    if not isinstance(figure, str):
+        return jsonify({"error": "cube must be figure text"}), 400
+
+    try:
+        wall_limit = float(data['wall_limit']) if 'wall_limit' in data else None
+        cpu_limit = int(data['cpu_limit']) if 'cpu_limit' in data else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "wall_limit and cpu_limit must be numbers"}), 400
+
+    try:
+        job = job_manager.submit(figure, data.get('kind', 'count'),
+                                 wall_limit=wall_limit, cpu_limit=cpu_limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+
+@jobs.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@jobs.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202 if job.status not in FINISHED else 409
+    return jsonify({**job.to_dict(), **job.result()})
+
+
+@jobs.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
@@ -106,22 +106,6 @@ class SomaGrid:
 
     @staticmethod
     def get_available_shapes() -> List[Dict]:
-        """Get list of available shapes."""
-        shapes = []
-        figures_dir = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
-        
-        for file_name in os.listdir(figures_dir):
-            if file_name.endswith('.soma'):
-                try:
-                    grid = SomaGrid.from_soma_file(os.path.join(figures_dir, file_name))
-                    shapes.append({
-                        'id': os.path.splitext(file_name)[0],
-                        'name': os.path.splitext(file_name)[0].replace('_', ' ').title(),
-                        'file': file_name,
-                        'dimensions': grid.dimensions,
-                        'occupied_cells': len(grid.occupied_cells)
-                    })
-                except Exception as e:
-                    logger.error(f"Error loading shape {file_name}: {str(e)}")
-        
-        return shapes 
\ No newline at end of file
+        """Get list of available shapes (cached, see figure_catalog.py)."""
+        from figure_catalog import figure_catalog
+        return figure_catalog.shapes()
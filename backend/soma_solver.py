@@ -0,0 +1,223 @@
+# In-process Soma solver.
+# The figure and every piece placement are integer bitmasks over the figure's
+# cells; the search is Knuth's Algorithm X (dict-of-sets form of Dancing Links)
+# over cell and piece columns, always branching on the column with the fewest
+# remaining candidate placements.
+# Coordinates are (x, y, z) = (column, row, slice) in the figure text, the same
+# layout YASS reads and prints.
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import geometry
+from utils import VALID_PIECES
+
+Cell = Tuple[int, int, int]
+
+# Piece shapes as defined by YASS (piece.cxx), origin cube first.
+PIECE_CELLS: Dict[str, Tuple[Cell, ...]] = {
+    'c': ((0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1)),
+    'p': ((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 0, 1)),
+    'n': ((0, 0, 0), (-1, 0, 0), (-1, 1, 0), (0, 0, 1)),
+    'z': ((0, 0, 0), (1, 1, 0), (0, 1, 0), (-1, 0, 0)),
+    't': ((0, 0, 0), (1, 0, 0), (0, 1, 0), (-1, 0, 0)),
+    'l': ((0, 0, 0), (1, 1, 0), (1, 0, 0), (-1, 0, 0)),
+    '3': ((0, 0, 0), (1, 0, 0), (0, 1, 0)),
+}
+PIECE_NAMES = tuple(sorted(VALID_PIECES - {'.'}))
+assert set(PIECE_NAMES) == set(PIECE_CELLS)
+
+# Below this many candidate placements the in-process search usually beats
+# spawning YASS (see bench_solver.py).
+SMALL_FIGURE_PLACEMENTS = 200
+
+
+def orientations(cells: Tuple[Cell, ...]) -> List[Tuple[Cell, ...]]:
+    """Distinct rotations of a piece, each translated so its minimum corner is 0."""
+    return geometry.orientations(cells)
+
+
+PIECE_ORIENTATIONS: Dict[str, List[Tuple[Cell, ...]]] = {
+    name: orientations(cells) for name, cells in PIECE_CELLS.items()
+}
+
+
+class Figure:
+    """
+    A parsed YASS figure. Cells are bits of one int laid out over the figure's
+    bounding box, padded so that shifting a piece mask never wraps a row, which
+    makes every translation of a piece a single shift. Pre-placed piece letters
+    are kept so the solver can leave them in place.
+    """
+
+    PAD = 3  # largest piece extent minus one
+
+    def __init__(self, cells: Dict[Cell, str]):
+        self.cells = cells
+        self.size = tuple(max(c[i] for c in cells) + 1 for i in range(3))
+        self.stride_x = 1
+        self.stride_y = self.size[0] + self.PAD
+        self.stride_z = self.stride_y * (self.size[1] + self.PAD)
+        self.coords: Dict[int, Cell] = {self.bit(c): c for c in cells}
+        self.full_mask = 0
+        self.preplaced: Dict[str, int] = {}
+        for cell, ch in cells.items():
+            bit = 1 << self.bit(cell)
+            self.full_mask |= bit
+            if ch in PIECE_CELLS:
+                self.preplaced[ch] = self.preplaced.get(ch, 0) | bit
+        self.free_mask = self.full_mask
+        for mask in self.preplaced.values():
+            self.free_mask &= ~mask
+        self._table = None
+
+    @classmethod
+    def from_text(cls, text: str) -> 'Figure':
+        """Parse YASS figure text ('#' comments, blank-line separated slices)."""
+        cells: Dict[Cell, str] = {}
+        z, y = 0, 0
+        in_slice = False
+        for raw in text.replace('\r\n', '\n').split('\n'):
+            line = raw.split('#', 1)[0].rstrip()
+            if not line:
+                if in_slice:
+                    z, y, in_slice = z + 1, 0, False
+                continue
+            if '\t' in line:
+                raise ValueError("Illegal tab character in figure")
+            for x, ch in enumerate(line):
+                if ch not in (' ', '.'):
+                    cells[(x, y, z)] = ch
+            y += 1
+            in_slice = True
+        if not cells:
+            raise ValueError("Empty figure")
+        return cls(cells)
+
+    def bit(self, cell: Cell) -> int:
+        x, y, z = cell
+        return x * self.stride_x + y * self.stride_y + z * self.stride_z
+
+    def mask_of(self, cells) -> int:
+        mask = 0
+        for c in cells:
+            mask |= 1 << self.bit(c)
+        return mask
+
+    def cells_of(self, mask: int) -> List[Cell]:
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.coords[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def table(self):
+        """This figure's cached PlacementTable (see placement_table.py)."""
+        if self._table is None:
+            # imported here because placement_table builds on this module
+            from placement_table import placement_table
+            self._table = placement_table(self)
+        return self._table
+
+    def placements(self) -> List[Tuple[str, int]]:
+        """Every (piece, mask) that fits entirely in the figure's free cells."""
+        return self.table().placements()
+
+    def render(self, solution: Dict[str, int]) -> str:
+        """
+        Draw a solution in YASS's output layout: the bounding box, '.' for
+        empty cells and ' ' for x columns no cell of the figure occupies.
+        """
+        lo = [min(c[i] for c in self.cells) for i in range(3)]
+        used_x = {x for x, _, _ in self.cells}
+        row = [' ' if x not in used_x else '.' for x in range(lo[0], self.size[0])]
+        grid = [[list(row) for _ in range(self.size[1] - lo[1])]
+                for _ in range(self.size[2] - lo[2])]
+        for name, mask in solution.items():
+            for x, y, z in self.cells_of(mask):
+                grid[z - lo[2]][y - lo[1]][x - lo[0]] = name
+        return '\n\n'.join('\n'.join(''.join(row) for row in layer) for layer in grid)
+
+
+def _search(X: Dict, Y: Dict, partial: List) -> Iterator[List]:
+    if not X:
+        yield list(partial)
+        return
+    col = min(X, key=lambda c: len(X[c]))
+    for row in list(X[col]):
+        partial.append(row)
+        removed = _select(X, Y, row)
+        yield from _search(X, Y, partial)
+        _deselect(X, Y, row, removed)
+        partial.pop()
+
+
+def _select(X: Dict, Y: Dict, row) -> List:
+    removed = []
+    for j in Y[row]:
+        for i in X[j]:
+            for k in Y[i]:
+                if k != j:
+                    X[k].remove(i)
+        removed.append(X.pop(j))
+    return removed
+
+
+def _deselect(X: Dict, Y: Dict, row, removed: List) -> None:
+    for j in reversed(Y[row]):
+        X[j] = removed.pop()
+        for i in X[j]:
+            for k in Y[i]:
+                if k != j:
+                    X[k].add(i)
+
+
+def iter_solutions(figure: Figure) -> Iterator[Dict[str, int]]:
+    """
+    Yield every solution as {piece: mask}, including pre-placed pieces.
+    Rotated and mirrored copies of a solution are all reported (like `soma -r`).
+    """
+    remaining = [p for p in PIECE_NAMES if p not in figure.preplaced]
+    free = figure.free_mask
+    need = sum(len(PIECE_CELLS[p]) for p in remaining)
+    if bin(free).count('1') != need:
+        return
+
+    table = figure.table()
+    placements = table.placements()
+    cell_bits = table.cell_bits.tolist()
+    X: Dict = {bit: set(table.rows_covering(i).tolist()) for i, bit in enumerate(cell_bits)}
+    for p in remaining:
+        X[p] = set()
+    Y: Dict[int, List] = {}
+    for row, ((name, _mask), cells) in enumerate(zip(placements, table.row_cells())):
+        X[name].add(row)
+        Y[row] = [name] + [cell_bits[i] for i in cells]
+
+    for rows in _search(X, Y, []):
+        solution = dict(figure.preplaced)
+        for row in rows:
+            name, mask = placements[row]
+            solution[name] = mask
+        yield solution
+
+
+def is_small_figure(figure: Figure) -> bool:
+    """True when solving in-process is expected to beat a YASS subprocess."""
+    return len(figure.placements()) <= SMALL_FIGURE_PLACEMENTS
+
+
+def first_solution(figure: Union[str, Figure]) -> Optional[str]:
+    """Rendered first solution of a figure (text or parsed), or None if it has none."""
+    if isinstance(figure, str):
+        figure = Figure.from_text(figure)
+    for solution in iter_solutions(figure):
+        return figure.render(solution)
+    return None
+
+
+def count_solutions(figure: Union[str, Figure]) -> int:
+    """Number of solutions counting rotations and reflections (as `soma -cr`)."""
+    if isinstance(figure, str):
+        figure = Figure.from_text(figure)
+    return sum(1 for _ in iter_solutions(figure))
@@ -0,0 +1,39 @@
+# test_concurrency.py
+# Hammers the solve endpoints from many threads at once and checks that every
+# response belongs to the figure that was sent (no shared input file races).
+# Set SOMA_EXECUTABLE to point at a yass binary built for this machine.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+from solve_cache import solve_cache
+from yass_runner import first_solution, run_soma
+
+FIGURES = ['cube', 'big_3', 'dog', 'tower', 'bathtub', 'battleship', 'crystal', 'elephant']
+
+if __name__ == "__main__":
+    figures_dir = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
+    texts = {}
+    for name in FIGURES:
+        with open(os.path.join(figures_dir, f"{name}.soma")) as f:
+            texts[name] = f.read()
+    expected = {name: run_soma(text, use_cache=False) for name, text in texts.items()}
+    solve_cache.clear()
+    expected_solve = {name: first_solution(text) or "No solution found." for name, text in texts.items()}
+    solve_cache.clear()
+
+    client = app.test_client()
+
+    def request_solve(i):
+        name = FIGURES[i % len(FIGURES)]
+        endpoint = '/api/solve' if i % 2 else '/api/validate_orientation'
+        resp = client.post(endpoint, json={'cube': texts[name], 'engine': 'yass'})
+        return name, endpoint, resp.get_json()['output']
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(request_solve, range(400)))
+
+    mismatches = [name for name, endpoint, output in results
+                  if output != (expected_solve if endpoint == '/api/solve' else expected)[name]]
+    print(f"{len(results)} requests, {len(mismatches)} mismatched")
+    assert not mismatches, mismatches
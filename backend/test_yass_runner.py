@@ -0,0 +1,36 @@
+# test_yass_runner.py
+# Checks that yass_runner reads YASS output correctly, including figures whose
+# slices YASS prints side by side separated by spaces.
+# Set SOMA_EXECUTABLE to point at a yass binary built for this machine.
+import os
+
+from yass_runner import first_solution, iter_solutions
+
+# Solvable figures YASS lays out with spaces between slices
+SPACED_FIGURES = ['3_notches', '15_12_cube', '3_pin_cube', 'corner_notch_cube', 'diamond_wall_plus_3']
+UNSOLVABLE_FIGURES = ['16_11_cube', 'bad_3_cube']
+
+if __name__ == "__main__":
+    figures_dir = os.path.join(os.path.dirname(__file__), 'yass', 'figures')
+
+    def read(name):
+        with open(os.path.join(figures_dir, f"{name}.soma")) as f:
+            return f.read()
+
+    for name in SPACED_FIGURES:
+        solution = first_solution(read(name))
+        assert solution is not None, f"{name}: solution not recognised"
+        assert ' ' in solution, f"{name}: expected a side-by-side layout"
+    for name in UNSOLVABLE_FIGURES:
+        assert first_solution(read(name)) is None, f"{name}: reported solvable"
+    print(f"first_solution: {len(SPACED_FIGURES)} spaced, {len(UNSOLVABLE_FIGURES)} unsolvable ok")
+
+    # the '#' echo of an unsolvable figure means no solutions, not an error
+    for name in UNSOLVABLE_FIGURES:
+        assert list(iter_solutions(read(name))) == [], f"{name}: unexpected solutions"
+    try:
+        list(iter_solutions(read('bad_child')))
+    except ValueError as e:
+        print(f"iter_solutions: echoes ok, bad_child rejected ({e})")
+    else:
+        raise AssertionError("bad_child: diagnostic not raised")
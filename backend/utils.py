@@ -3,6 +3,10 @@ import logging
 import json
 from typing import Set, Tuple, Optional
 
+import numpy as np
+
+import geometry
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -106,78 +110,29 @@ def normalize_solution(solution: str, shape_id: str) -> str:
         original_width = len(original_layers[0].split('\n')[0])
         original_depth = len(original_layers)
         
-        # Convert solution to 3D array
+        # Solution as a character grid indexed [x, y, z]
         layers = solution.strip().split('\n\n')
-        grid = [[list(row) for row in layer.split('\n')] for layer in layers]
-        height = len(grid[0])
-        width = len(grid[0][0])
-        depth = len(grid)
-        
-        def get_piece_positions(grid):
-            """Get the positions of all pieces in the grid."""
-            positions = []
-            for z in range(depth):
-                for y in range(height):
-                    for x in range(width):
-                        if grid[z][y][x] != '.':
-                            positions.append((x, y, z, grid[z][y][x]))
-            return positions
-        
-        def rotate_positions(positions, axis):
-            """Rotate piece positions around the given axis."""
-            rotated = []
-            for x, y, z, piece in positions:
-                if axis == 'x':
-                    new_x, new_y, new_z = x, -z, y
-                elif axis == 'y':
-                    new_x, new_y, new_z = z, y, -x
-                else:  # z
-                    new_x, new_y, new_z = -y, x, z
-                rotated.append((new_x, new_y, new_z, piece))
-            return rotated
-        
-        def positions_to_grid(positions):
-            """Convert piece positions back to a grid."""
-            grid = [[['.' for _ in range(width)] for _ in range(height)] for _ in range(depth)]
-            
-            # Find the minimum coordinates to normalize position
-            min_x = min(x for x, _, _, _ in positions)
-            min_y = min(y for _, y, _, _ in positions)
-            min_z = min(z for _, _, z, _ in positions)
-            
-            # Place pieces in grid, normalized to start at (0,0,0)
-            for x, y, z, piece in positions:
-                norm_x = x - min_x
-                norm_y = y - min_y
-                norm_z = z - min_z
-                if 0 <= norm_x < width and 0 <= norm_y < height and 0 <= norm_z < depth:
-                    grid[norm_z][norm_y][norm_x] = piece
-            
-            return grid
-        
-        def grid_to_string(grid):
-            """Convert grid to string format."""
-            layers = []
-            for layer in grid:
-                rows = [''.join(row) for row in layer]
-                layers.append('\n'.join(rows))
-            return '\n\n'.join(layers)
-        
-        positions = get_piece_positions(grid)
+        grid = np.array([[list(row) for row in layer.split('\n')] for layer in layers]).transpose(2, 1, 0)
+        width, height, depth = grid.shape
+
+        # Crop to the pieces, turn the crop by each of the 24 rotations (one
+        # index gather each) and put it back at the origin of a grid the
+        # solution's size; rotations that don't fit can't match the figure.
+        xs, ys, zs = np.nonzero(grid != '.')
+        pieces = grid[xs.min():xs.max() + 1, ys.min():ys.max() + 1, zs.min():zs.max() + 1]
         rotations = set()
-        
-        # Try all possible rotations (4 for each axis)
-        for _ in range(4):  # Z rotations
-            for _ in range(4):  # Y rotations
-                for _ in range(4):  # X rotations
-                    rotated_grid = positions_to_grid(positions)
-                    rotated_str = grid_to_string(rotated_grid)
-                    if is_valid_placement(rotated_str, shape_id):
-                        rotations.add(rotated_str)
-                    positions = rotate_positions(positions, 'x')
-                positions = rotate_positions(positions, 'y')
-            positions = rotate_positions(positions, 'z')
-        
+        for index in range(24):
+            rotated = geometry.rotate_grid(pieces, index)
+            dx, dy, dz = rotated.shape
+            if dx > width or dy > height or dz > depth:
+                continue
+            placed = np.full((width, height, depth), '.')
+            placed[:dx, :dy, :dz] = rotated
+            rotated_str = '\n\n'.join('\n'.join(''.join(placed[:, y, z]) for y in range(height))
+                                       for z in range(depth))
+            if is_valid_placement(rotated_str, shape_id):
+                rotations.add(rotated_str)
+
         if not rotations:
             logger.error("No valid rotations found for the shape")
             return solution.strip()
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import logging
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from solve_cache import solve_cache, cache_key, PIECE_LETTERS
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SOMA_EXECUTABLE = os.environ.get('SOMA_EXECUTABLE', os.path.join(BACKEND_DIR, 'yass', 'soma'))
+
+
+def run_soma(figure_text: str, flags: Sequence[str] = (), use_cache: bool = True) -> str:
+    """
+    Solve figure_text with YASS and return its stdout.
+    The figure is piped to YASS on stdin, so concurrent requests never share a
+    file. Results are served from the solve cache when the same normalized
+    figure was already solved with the same flags; only successful runs are cached.
+    """
+    key = cache_key(figure_text, flags)
+    if use_cache:
+        cached = solve_cache.get(key)
+        if cached is not None:
+            logger.debug(f"Solve cache hit {key[:12]}")
+            return cached
+
+    result = subprocess.run(
+        [SOMA_EXECUTABLE, *flags, '-'],
+        input=figure_text,
+        cwd=BACKEND_DIR,
+        capture_output=True, text=True
+    )
+    if use_cache and result.returncode == 0:
+        solve_cache.put(key, result.stdout)
+    return result.stdout
+
+
+def first_solution(figure_text: str) -> Optional[str]:
+    """
+    Return the first solution YASS finds for figure_text, or None.
+    Runs YASS in its default first-solution mode (no -a), which stops searching
+    as soon as one solution is printed, so latency does not depend on how many
+    solutions the figure has. YASS prints the slices of a wide figure side by
+    side, separated by spaces. Unsolvable figures come back either as a
+    diagnostic message or as the figure drawn with '#' cubicles.
+    """
+    output = run_soma(figure_text, ['-q']).strip()
+    if output and set(output) <= PIECE_LETTERS | {'.', ' ', '\n'}:
+        return output
+    return None
+
+
+def parse_solution(text: str) -> Dict[str, List[List[int]]]:
+    """
+    Convert one printed YASS solution into {piece: [[x, y, z], ...]}, where x is
+    the column, y the row and z the slice index in the printed layout.
+    """
+    pieces: Dict[str, List[List[int]]] = {}
+    for z, layer in enumerate(text.strip().split('\n\n')):
+        for y, row in enumerate(layer.split('\n')):
+            for x, cell in enumerate(row):
+                if cell in PIECE_LETTERS:
+                    pieces.setdefault(cell, []).append([x, y, z])
+    return pieces
+
+
+def iter_solutions(figure_text: str) -> Iterator[Dict[str, List[List[int]]]]:
+    """
+    Yield every unique solution of figure_text as a piece-to-cells map while
+    YASS is still running. Only one solution is held in memory at a time, and
+    the YASS process is killed if the consumer stops early.
+    Raises ValueError with YASS's message if the figure is rejected.
+    """
+    proc = subprocess.Popen(
+        [SOMA_EXECUTABLE, '-a', '-q', '-'],
+        cwd=BACKEND_DIR,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        text=True, bufsize=1
+    )
+    try:
+        proc.stdin.write(figure_text)
+        proc.stdin.close()
+
+        preamble: List[str] = []
+        current: Optional[List[str]] = None
+        for line in proc.stdout:
+            if line.startswith('solution #'):
+                if current is not None:
+                    yield parse_solution(''.join(current))
+                current = []
+            elif current is None:
+                preamble.append(line)
+            else:
+                current.append(line)
+        if current is not None:
+            yield parse_solution(''.join(current))
+        else:
+            message = ''.join(preamble).strip()
+            # an unsolvable figure is echoed back with '#' cubicles, laid out
+            # like a solution and possibly with some pieces already placed
+            echo = '#' in message and set(message) <= PIECE_LETTERS | {'#', '.', ' ', '\n'}
+            if message and not echo:
+                raise ValueError(message)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()